@@ -1,7 +1,36 @@
-from .github_stats import get_language_stats, get_repo_timeline
-from .visualize import (create_language_pie, create_repo_timeline,
-                        create_repo_wordcloud)
+import importlib
 
+# Public helpers and the submodule defining them. Submodules pull in requests,
+# numpy, matplotlib and wordcloud, so they are only imported on first access.
+_LAZY_ATTRS = {
+    'build_batch': 'batch',
+    'get_commit_index': 'github_stats',
+    'get_incomplete': 'github_stats',
+    'get_language_stats': 'github_stats',
+    'get_repo_timeline': 'github_stats',
+    'get_timeline': 'github_stats',
+    'RECORDER': 'metrics',
+    'CommitIndex': 'model',
+    'Timeline': 'model',
+    'chart_jobs': 'render',
+    'render_charts': 'render',
+    'print_language_bars': 'text',
+    'print_timeline_bars': 'text',
+    'create_contribution_heatmap': 'visualize',
+    'create_language_pie': 'visualize',
+    'create_repo_timeline': 'visualize',
+    'create_repo_wordcloud': 'visualize',
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(f'.{_LAZY_ATTRS[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
 
 def list_skills(skills):
     print('\n'.join(f"{category}: {', '.join(items)}" for category, items in skills.items()))
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .cache import ResponseCache
+from .client import MAX_WORKERS, GitHubClient
+from . import github_stats, graphql
+from .github_stats import get_incomplete
+from .metrics import RECORDER
+from .profiles import DEFAULT_PROFILE, PROFILES
+from .render import RENDER_WORKERS, RenderPool, chart_jobs
+
+BATCH_WORKERS = 4  # users fetched at the same time
+
+def fetch_user_stats(username, client=None, backend=github_stats):
+    """Fetch everything a resume needs for one user through a backend module."""
+    # The timeline syncs every repository first, so language stats reuse it
+    repo_timeline = backend.get_timeline(username, client)
+    return {
+        'username': username,
+        'language_stats': backend.get_language_stats(username, client),
+        'repo_timeline': repo_timeline,
+        'commit_index': backend.get_commit_index(username, client),
+        'incomplete': get_incomplete(client, username)
+    }
+
+def write_user_stats(stats, output_dir):
+    """Write a user's stats JSON into output_dir, without the daily commit index."""
+    os.makedirs(output_dir, exist_ok=True)
+    stats = {key: value for key, value in stats.items() if key != 'commit_index'}
+    with open(os.path.join(output_dir, 'stats.json'), 'w') as f:
+        json.dump(stats, f, indent=2, default=lambda timeline: timeline.to_dict())
+
+def build_batch(usernames, output_root='resumes', client=None, workers=BATCH_WORKERS,
+                render_workers=RENDER_WORKERS, backend=github_stats, profile=DEFAULT_PROFILE,
+                fast_wordcloud=None):
+    """Build stats and charts for many users into output_root/<username>/."""
+    if client is None:
+        # One pool and cache for the whole batch, sized for every user's fan-out
+        client = GitHubClient(pool_size=workers * MAX_WORKERS, cache=ResponseCache())
+
+    renders = {}
+    with RenderPool(render_workers) as pool, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_user_stats, username, client, backend): username
+                   for username in dict.fromkeys(usernames)}
+
+        # Queue each user's charts on the render pool as soon as their stats arrive
+        for future in as_completed(futures):
+            username = futures[future]
+            output_dir = os.path.join(output_root, username)
+            try:
+                stats = future.result()
+                write_user_stats(stats, output_dir)
+            except Exception as e:
+                print(f"Error building resume for {username}: {e}")
+                renders[username] = []
+                continue
+            renders[username] = [
+                pool.submit(*job)
+                for job in chart_jobs(stats['language_stats'], stats['repo_timeline'],
+                                      output_dir, profile, stats['commit_index'], fast_wordcloud)]
+
+        return {username: [path for path in map(pool.result, renders[username]) if path]
+                for username in futures.values()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build resume charts for many GitHub users.")
+    parser.add_argument('usernames', nargs='+', help="GitHub usernames")
+    parser.add_argument('-o', '--output', default='resumes',
+                        help="directory receiving one sub-directory per user")
+    parser.add_argument('-w', '--workers', type=int, default=BATCH_WORKERS,
+                        help="users fetched concurrently")
+    parser.add_argument('-r', '--render-workers', type=int, default=RENDER_WORKERS,
+                        help="processes rendering charts")
+    parser.add_argument('--graphql', action='store_true',
+                        help="fetch through the GraphQL API (needs a token)")
+    parser.add_argument('--profile', choices=PROFILES, default=DEFAULT_PROFILE,
+                        help="render profile, which also picks the chart format")
+    parser.add_argument('--fast-wordcloud', action='store_true', default=None,
+                        help="place only the top repositories in the word cloud")
+    parser.add_argument('--report', action='store_true',
+                        help="print API call and render timings at the end")
+    args = parser.parse_args(argv)
+
+    client = GitHubClient(pool_size=args.workers * MAX_WORKERS, cache=ResponseCache())
+    results = build_batch(args.usernames, args.output, client, args.workers,
+                          args.render_workers, graphql if args.graphql else github_stats,
+                          args.profile, args.fast_wordcloud)
+    for username, paths in results.items():
+        print(f"{username}: {len(paths)} charts in {os.path.join(args.output, username)}")
+    for note in get_incomplete(client):
+        print("Incomplete data:", note)
+    if args.report:
+        print(RECORDER.format_report())
+
+if __name__ == '__main__':
+    main()
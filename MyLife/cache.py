@@ -0,0 +1,291 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .profiles import DEFAULT_PROFILE, output_format
+
+CACHE_DIR = os.environ.get('MYLIFE_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'mylife'))
+
+# Responses younger than the TTL are served without touching the network;
+# older ones are revalidated with If-None-Match / If-Modified-Since
+HTTP_CACHE_TTL = 10 * 60
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+RENDER_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RENDER_CACHE_VERSION = 1  # bump when a renderer's output changes for the same input
+
+class ResponseCache:
+    """SQLite-backed store of GitHub API responses with LRU size eviction."""
+
+    def __init__(self, path=None, ttl=HTTP_CACHE_TTL, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.path = path or os.path.join(CACHE_DIR, 'http.sqlite')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS responses (
+                               key TEXT PRIMARY KEY,
+                               url TEXT,
+                               status INTEGER,
+                               headers TEXT,
+                               body BLOB,
+                               stored_at REAL,
+                               accessed_at REAL)''')
+        self.db.commit()
+        self.size = self.db.execute(
+            'SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses').fetchone()[0]
+
+    @staticmethod
+    def make_key(url, params=None, identity=''):
+        """Key a request by URL, query parameters and auth identity."""
+        raw = json.dumps([url, sorted((params or {}).items()), identity], default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def lookup(self, key):
+        """Return the cached entry for key as a dict, or None."""
+        with self.lock:
+            row = self.db.execute(
+                'SELECT url, status, headers, body, stored_at FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?',
+                            (time.time(), key))
+            self.db.commit()
+        url, status, headers, body, stored_at = row
+        return {'url': url, 'status': status,
+                'headers': CaseInsensitiveDict(json.loads(headers)),
+                'body': body, 'stored_at': stored_at}
+
+    def is_fresh(self, entry):
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def store(self, key, response):
+        """Save a successful response, evicting least recently used entries."""
+        body = response.content
+        now = time.time()
+        with self.lock:
+            old = self.db.execute('SELECT LENGTH(body) FROM responses WHERE key = ?',
+                                  (key,)).fetchone()
+            self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            (key, response.url, response.status_code,
+                             json.dumps(dict(response.headers)), body, now, now))
+            self.size += len(body) - (old[0] if old else 0)
+            self._evict()
+            self.db.commit()
+
+    def revalidated(self, key):
+        """Mark an entry fresh again after the server answered 304."""
+        with self.lock:
+            now = time.time()
+            self.db.execute('UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?',
+                            (now, now, key))
+            self.db.commit()
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            row = self.db.execute('SELECT key, LENGTH(body) FROM responses '
+                                  'ORDER BY accessed_at LIMIT 1').fetchone()
+            if row is None:
+                self.size = 0
+                break
+            self.db.execute('DELETE FROM responses WHERE key = ?', (row[0],))
+            self.size -= row[1]
+
+    def clear(self):
+        with self.lock:
+            self.db.execute('DELETE FROM responses')
+            self.db.commit()
+            self.size = 0
+
+    def close(self):
+        self.db.close()
+
+def build_response(entry):
+    """Rebuild a requests.Response from a cache entry."""
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.headers = entry['headers']
+    response._content = entry['body']
+    response.url = entry['url']
+    response.encoding = 'utf-8'
+    response.from_cache = True
+    return response
+
+def _jsonable(value):
+    # Compact models such as Timeline hash by their dict form
+    return value.to_dict() if hasattr(value, 'to_dict') else str(value)
+
+class RenderCache:
+    """Directory of rendered charts keyed by a hash of their inputs, LRU by mtime."""
+
+    def __init__(self, directory=None, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.directory = directory or os.path.join(CACHE_DIR, 'renders')
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(renderer_name, data, params=None):
+        """Hash a renderer's name, input data and render parameters.
+
+        Mappings in data keep their order, since e.g. the order of language
+        stats sets the order of the pie slices; parameters are sorted by name.
+        """
+        raw = json.dumps([RENDER_CACHE_VERSION, renderer_name, data,
+                          sorted((params or {}).items())], default=_jsonable)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _file(self, key, fmt):
+        return os.path.join(self.directory, f'{key}.{fmt}')
+
+    def _write(self, cached, data):
+        # Write through a temporary file, so readers never see a partial entry
+        tmp = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, cached)
+        with self.lock:
+            self._evict()
+
+    def load(self, key, fmt):
+        """Return a cached render as bytes, or None on a miss."""
+        cached = self._file(key, fmt)
+        try:
+            with open(cached, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(cached)  # Mark as recently used
+        return data
+
+    def save(self, key, data, fmt):
+        """Keep a render given as bytes and enforce the size cap."""
+        self._write(self._file(key, fmt), data)
+
+    def restore(self, key, path, fmt):
+        """Copy a cached render to path; return False on a miss."""
+        cached = self._file(key, fmt)
+        try:
+            shutil.copyfile(cached, path)
+            os.utime(cached)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def store(self, key, path, fmt):
+        """Keep a copy of a freshly rendered file and enforce the size cap."""
+        with open(path, 'rb') as f:
+            self.save(key, f.read(), fmt)
+
+    def load_json(self, key):
+        """Return a value saved with store_json, or None on a miss."""
+        data = self.load(key, 'json')
+        try:
+            return json.loads(data) if data is not None else None
+        except ValueError:
+            return None
+
+    def store_json(self, key, value):
+        """Save an intermediate result, such as a layout, under the same size cap."""
+        self.save(key, json.dumps(value).encode(), 'json')
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, file_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+_render_cache = None
+_render_cache_disabled = False
+
+def get_render_cache():
+    """Return the default render cache, or None when caching is disabled."""
+    global _render_cache
+    if _render_cache_disabled:
+        return None
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
+
+def set_render_cache(cache):
+    """Replace the default render cache; pass None to disable render caching.
+
+    Only the calling process is affected: RenderPool workers are spawned with
+    the default cache under MYLIFE_CACHE_DIR.
+    """
+    global _render_cache, _render_cache_disabled
+    _render_cache = cache
+    _render_cache_disabled = cache is None
+
+def cached_render(renderer):
+    """Skip a renderer(data, path, **params) call when an identical render is cached.
+
+    path may be a file path, a writable binary file object, or None to get the
+    image back as bytes. The renderer itself only sees file paths and None.
+    Renders kept in memory are cached on disk all the same; call
+    set_render_cache(None) to turn caching off in this process.
+    """
+    default_path = inspect.signature(renderer).parameters['path'].default
+
+    @functools.wraps(renderer)
+    def wrapper(data, path=default_path, **params):
+        to_file = isinstance(path, str)
+        cache = get_render_cache()
+        if cache is None or not data:
+            return _deliver(renderer(data, path if to_file else None, **params), path)
+
+        profile = params.get('profile', DEFAULT_PROFILE)
+        fmt = output_format(path, profile)
+        key = cache.make_key(renderer.__name__, data, dict(params, profile=profile, format=fmt))
+        if to_file:
+            if cache.restore(key, path, fmt):
+                return path
+            result = renderer(data, path, **params)
+            if result:
+                cache.store(key, result, fmt)
+            return result
+
+        image = cache.load(key, fmt)
+        if image is None:
+            image = renderer(data, None, **params)
+            if image:
+                cache.save(key, image, fmt)
+        return _deliver(image, path)
+    return wrapper
+
+def _deliver(result, path):
+    # Hand bytes rendered for a file object over to it
+    if result is None or path is None or isinstance(path, str):
+        return result
+    path.write(result)
+    return path
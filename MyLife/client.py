@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache import ResponseCache, build_response
+from .metrics import RECORDER
+from .ratelimit import NORMAL, RateLimitExceeded, RateLimitScheduler
+
+try:
+    from .config import GITHUB_TOKEN
+except ImportError:
+    GITHUB_TOKEN = None
+
+API_URL = 'https://api.github.com'
+
+# Connection pool and retry defaults, shared by every fetch function
+POOL_SIZE = 16
+TIMEOUT = (5, 30)  # (connect, read) seconds
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+MAX_WORKERS = 8  # concurrent per-repository fetches; keep <= POOL_SIZE
+
+class GraphQLError(requests.RequestException):
+    """Raised when a GraphQL query returns errors instead of data."""
+
+def get_headers(token=GITHUB_TOKEN):
+    """Get HTTP headers for GitHub API requests."""
+    headers = {'Accept': 'application/vnd.github.v3+json'}
+    if token:
+        headers['Authorization'] = f'token {token}'
+    return headers
+
+class GitHubClient:
+    """Keep-alive GitHub API client backed by a pooled requests session."""
+
+    def __init__(self, token=GITHUB_TOKEN, api_url=API_URL, pool_size=POOL_SIZE,
+                 timeout=TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_factor=BACKOFF_FACTOR, max_workers=MAX_WORKERS,
+                 cache=None, scheduler=None):
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_workers = min(max_workers, pool_size)
+
+        retry = Retry(total=max_retries,
+                      backoff_factor=backoff_factor,
+                      status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset({'GET', 'HEAD'}),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size,
+                              max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(get_headers(token))
+
+        # Optional ResponseCache; entries are partitioned by a token digest
+        self.cache = cache
+        self.identity = hashlib.sha256((token or '').encode()).hexdigest()[:16]
+
+        # username, or (kind, username), -> repository listing, fetched once per client
+        self.inventory = {}
+
+        # Rate-limit budget shared by every request made through this client
+        self.scheduler = scheduler or RateLimitScheduler()
+
+        # username -> human-readable notes about data that could not be fetched
+        self.incomplete = {}
+        self._incomplete_lock = threading.Lock()
+
+    def url(self, path):
+        """Resolve an API path such as '/users/x' against the base URL."""
+        if path.startswith(('http://', 'https://')):
+            return path
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    def _send(self, url, params, headers=None, priority=NORMAL, method='GET', json=None):
+        """Send a request once the rate-limit budget allows, retrying limited calls."""
+        for attempt in range(self.scheduler.max_attempts):
+            self.scheduler.acquire(priority)
+            response = self.session.request(method, url, params=params, headers=headers,
+                                            json=json, timeout=self.timeout)
+            if not self.scheduler.update(response):
+                return response
+        raise RateLimitExceeded(f"Rate limited {self.scheduler.max_attempts} times on {url}",
+                                response=response)
+
+    def get(self, path, params=None, priority=NORMAL):
+        """Issue a GET request, answering from the cache when possible."""
+        url = self.url(path)
+        start = time.perf_counter()
+        try:
+            response, cache = self._get(url, params, priority)
+        except requests.RequestException:
+            RECORDER.record_call(url, 0, 0, time.perf_counter() - start)
+            raise
+        self._record(response, start, cache)
+        return response
+
+    def post_graphql(self, query, variables=None, priority=NORMAL):
+        """Run a GraphQL query and return its data. Responses are never cached."""
+        if 'Authorization' not in self.session.headers:
+            raise GraphQLError("The GraphQL API requires a GitHub token")
+
+        url = self.url('/graphql')
+        start = time.perf_counter()
+        try:
+            response = self._send(url, None, priority=priority, method='POST',
+                                  json={'query': query, 'variables': variables or {}})
+        except requests.RequestException:
+            RECORDER.record_call(url, 0, 0, time.perf_counter() - start)
+            raise
+        self._record(response, start)
+
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('errors'):
+            raise GraphQLError('; '.join(error.get('message', str(error))
+                                         for error in payload['errors']), response=response)
+        return payload['data']
+
+    @staticmethod
+    def _record(response, start, cache=None):
+        # Cached headers carry a stale budget, so only live responses report it
+        remaining = response.headers.get('X-RateLimit-Remaining') if cache != 'hit' else None
+        RECORDER.record_call(response.url, response.status_code, len(response.content),
+                             time.perf_counter() - start, cache,
+                             int(remaining) if remaining is not None else None)
+
+    def _get(self, url, params, priority):
+        """Return (response, cache outcome) for one GET."""
+        if self.cache is None:
+            return self._send(url, params, priority=priority), None
+
+        key = self.cache.make_key(url, params, self.identity)
+        entry = self.cache.lookup(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            return build_response(entry), 'hit'
+
+        # Revalidate stale entries with a conditional request
+        headers = {}
+        if entry is not None:
+            if 'ETag' in entry['headers']:
+                headers['If-None-Match'] = entry['headers']['ETag']
+            if 'Last-Modified' in entry['headers']:
+                headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+
+        response = self._send(url, params, headers, priority)
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidated(key)
+            return build_response(entry), 'revalidated'
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        return response, 'miss'
+
+    def mark_incomplete(self, username, note):
+        """Record that some of a user's results are missing data, e.g. after a rate limit."""
+        with self._incomplete_lock:
+            self.incomplete.setdefault(username, []).append(note)
+
+    def forget(self, username):
+        """Drop a user's repository listings and incomplete-data notes."""
+        with self._incomplete_lock:
+            self.incomplete.pop(username, None)
+        for key in list(self.inventory):
+            if key == username or isinstance(key, tuple) and key[-1] == username:
+                self.inventory.pop(key, None)
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_default_client = None
+_default_lock = threading.Lock()
+
+def get_client():
+    """Return the process-wide default client, creating it on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = GitHubClient(cache=ResponseCache())
+        return _default_client
+
+def set_client(client):
+    """Replace the process-wide default client (e.g. to tune pool size)."""
+    global _default_client
+    with _default_lock:
+        _default_client = client
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+LANGUAGES = ['Python', 'C++', 'Swift', 'JavaScript', 'TypeScript', 'Go', None]
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+def make_account(username='octocat', repos=10, commits_per_repo=50, seed=0,
+                 start=datetime(2020, 1, 1, tzinfo=timezone.utc), days=4 * 365):
+    """Generate a deterministic synthetic account of the given size."""
+    rnd = random.Random(seed)
+    account = {
+        'user': {'login': username, 'created_at': start.strftime(DATE_FORMAT)},
+        'repos': [],
+        'commits': {},
+        'releases': {}
+    }
+    for i in range(repos):
+        name = f'project-{i:04d}'
+        dates = sorted((start + timedelta(seconds=rnd.randrange(days * 86400))).strftime(DATE_FORMAT)
+                       for _ in range(rnd.randint(0, 2 * commits_per_repo)))
+        commits = [{
+            'sha': hashlib.sha1(f'{name}/{n}'.encode()).hexdigest(),
+            'commit': {'author': {'name': username, 'date': date},
+                       'committer': {'name': username, 'date': date}}
+        } for n, date in enumerate(dates)]
+        commits.reverse()  # Newest first, like the API
+
+        account['commits'][name] = commits
+        account['releases'][name] = [
+            {'tag_name': f'v{n}', 'assets': [{'download_count': rnd.randint(0, 500)}]}
+            for n in range(rnd.randint(0, 3))
+        ]
+        account['repos'].append({
+            'name': name,
+            'language': rnd.choice(LANGUAGES),
+            'stargazers_count': rnd.randint(0, 50),
+            'pushed_at': dates[-1] if dates else start.strftime(DATE_FORMAT)
+        })
+    return account
+
+def add_commit(account, repo_name, date=None):
+    """Push a new commit to a repository, dated date (default now), and bump its pushed_at."""
+    pushed_at = datetime.now(timezone.utc).strftime(DATE_FORMAT)
+    date = date or pushed_at
+    commits = account['commits'][repo_name]
+    commits.insert(0, {
+        'sha': hashlib.sha1(f'{repo_name}/{len(commits)}/{date}'.encode()).hexdigest(),
+        'commit': {'author': {'name': account['user']['login'], 'date': date},
+                   'committer': {'name': account['user']['login'], 'date': date}}
+    })
+    for repo in account['repos']:
+        if repo['name'] == repo_name:
+            repo['pushed_at'] = max(pushed_at, date)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        hub = self.server.hub
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+        hub.count_request(url.path)
+        if hub.latency:
+            time.sleep(hub.latency)
+
+        if not hub.take_budget():
+            return self._send_json({'message': 'API rate limit exceeded'}, 403)
+
+        account = hub.account
+        if parts[0] in ('users', 'repos') and len(parts) > 1 and not hub.is_login(parts[1]):
+            return self._send_json({'message': 'Not Found'}, 404)  # Only one account exists
+        if parts[0] == 'users' and len(parts) == 2:
+            return self._send_json(account['user'])
+        if parts[0] == 'users' and parts[2:] == ['repos']:
+            return self._send_page(account['repos'], query, url.path)
+        if parts[0] == 'repos' and len(parts) == 4 and parts[2] in account['commits']:
+            if parts[3] == 'releases':
+                return self._send_page(account['releases'][parts[2]], query, url.path)
+            if parts[3] == 'commits':
+                commits = account['commits'][parts[2]]
+                if not commits:
+                    return self._send_json({'message': 'Git Repository is empty.'}, 409)
+                if 'since' in query:
+                    commits = [c for c in commits if c['commit']['committer']['date'] >= query['since']]
+                return self._send_page(commits, query, url.path)
+        self._send_json({'message': 'Not Found'}, 404)
+
+    def do_POST(self):
+        hub = self.server.hub
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        hub.count_request(self.path)
+        if hub.latency:
+            time.sleep(hub.latency)
+
+        if self.path != '/graphql':
+            return self._send_json({'message': 'Not Found'}, 404)
+        if 'Authorization' not in self.headers:
+            return self._send_json({'message': 'This endpoint requires you to be authenticated.'}, 401)
+        if not hub.take_budget():
+            return self._send_json({'message': 'API rate limit exceeded'}, 403)
+
+        # Only the operations MyLife.graphql sends, matched by operation name
+        operation = re.match(r'\s*query\s+(\w+)', body.get('query', ''))
+        resolve = getattr(self, f'_resolve_{operation.group(1).lower()}', None) if operation else None
+        if resolve is None:
+            return self._send_json({'errors': [{'message': 'Unsupported query'}]})
+        variables = body.get('variables', {})
+        if not hub.is_login(variables.get('login') or ''):
+            return self._send_json({'data': {'user': None}, 'errors': [{
+                'type': 'NOT_FOUND',
+                'message': f"Could not resolve to a User with the login of '{variables.get('login')}'."}]})
+        self._send_json({'data': {'user': resolve(variables)}})
+
+    def _resolve_user(self, variables):
+        user = self.server.hub.account['user']
+        return {'createdAt': user['created_at']}
+
+    def _resolve_repositories(self, variables):
+        account = self.server.hub.account
+        repos = sorted(account['repos'], key=lambda repo: repo['name'])
+        offset = int(variables.get('cursor') or 0)
+        nodes = [{
+            'name': repo['name'],
+            'pushedAt': repo['pushed_at'],
+            'stargazerCount': repo['stargazers_count'],
+            'primaryLanguage': {'name': repo['language']} if repo['language'] else None,
+            'releases': {'nodes': [
+                {'releaseAssets': {'nodes': [{'downloadCount': asset['download_count']}
+                                             for asset in release['assets'][:50]]}}
+                for release in account['releases'][repo['name']][:30]]}
+        } for repo in repos[offset:offset + 100]]
+        return {'repositories': {
+            'pageInfo': {'hasNextPage': offset + 100 < len(repos),
+                         'endCursor': str(offset + len(nodes))},
+            'nodes': nodes
+        }}
+
+    def _resolve_contributions(self, variables):
+        account = self.server.hub.account
+        windows = {}
+        for i in range(len(variables)):
+            if f'from{i}' not in variables:
+                break
+            start, end = variables[f'from{i}'][:10], variables[f'to{i}'][:10]
+            by_repo = []
+            for name, commits in account['commits'].items():
+                days = Counter(commit['commit']['author']['date'][:10] for commit in commits)
+                days = sorted((day, count) for day, count in days.items() if start <= day <= end)
+                if days:
+                    by_repo.append({
+                        'repository': {'name': name, 'owner': {'login': account['user']['login']}},
+                        'contributions': {'nodes': [{'occurredAt': f'{day}T00:00:00Z', 'commitCount': count}
+                                                    for day, count in days[:100]]}
+                    })
+            by_repo.sort(key=lambda entry: -sum(node['commitCount']
+                                                for node in entry['contributions']['nodes']))
+            windows[f'q{i}'] = {'commitContributionsByRepository': by_repo[:100]}
+        return windows
+
+    def _send_page(self, items, query, path):
+        per_page = min(int(query.get('per_page', 30)), 100)
+        page = int(query.get('page', 1))
+        last = max(1, -(-len(items) // per_page))
+
+        def link(number):
+            return f"{self.server.hub.url}{path}?{urlencode(dict(query, page=number))}"
+
+        links = []
+        if page < last:
+            links.append(f'<{link(page + 1)}>; rel="next"')
+            links.append(f'<{link(last)}>; rel="last"')
+        if page > 1:
+            links.append(f'<{link(1)}>; rel="first"')
+        self._send_json(items[(page - 1) * per_page:page * per_page], links=links)
+
+    def _send_json(self, payload, status=200, links=()):
+        hub = self.server.hub
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            hub.refund_budget()  # Conditional hits are free on GitHub
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            hub.send_rate_headers(self)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        if links:
+            self.send_header('Link', ', '.join(links))
+        hub.send_rate_headers(self)
+        self.end_headers()
+        self.wfile.write(body)
+        with hub.lock:
+            hub.bytes_sent += len(body)
+
+class FakeGitHub:
+    """Serve an account from make_account() on a local port in a background thread."""
+
+    def __init__(self, account, latency=0.0, rate_limit=None, rate_window=3600):
+        self.account = account
+        self.latency = latency
+        self.rate_limit = rate_limit  # None disables rate limiting
+        self.rate_window = rate_window
+        self.lock = threading.Lock()
+        self.reset_stats()
+        self._reset_budget()
+
+        ThreadingHTTPServer.allow_reuse_address = True
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 128
+        self.server.hub = self
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = None
+
+    def is_login(self, login):
+        """Logins are case-insensitive, as on GitHub."""
+        return login.lower() == self.account['user']['login'].lower()
+
+    def reset_stats(self):
+        self.requests = Counter()
+        self.bytes_sent = 0
+
+    @property
+    def request_count(self):
+        return sum(self.requests.values())
+
+    def count_request(self, path):
+        parts = path.strip('/').split('/')
+        endpoint = '/'.join(parts[:1] + parts[3:]) if parts[0] == 'repos' else '/'.join(parts[:1] + parts[2:])
+        with self.lock:
+            self.requests[endpoint] += 1
+
+    def _reset_budget(self):
+        self.remaining = self.rate_limit
+        self.reset_at = time.time() + self.rate_window
+
+    def take_budget(self):
+        if self.rate_limit is None:
+            return True
+        with self.lock:
+            if time.time() >= self.reset_at:
+                self._reset_budget()
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+    def refund_budget(self):
+        if self.rate_limit is not None:
+            with self.lock:
+                self.remaining += 1
+
+    def send_rate_headers(self, handler):
+        if self.rate_limit is not None:
+            handler.send_header('X-RateLimit-Limit', str(self.rate_limit))
+            handler.send_header('X-RateLimit-Remaining', str(self.remaining))
+            handler.send_header('X-RateLimit-Reset', str(int(self.reset_at) + 1))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,76 +1,113 @@
-from collections import defaultdict
-from datetime import datetime
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
 
 import requests
 
-try:
-    from .config import GITHUB_TOKEN
-except ImportError:
-    GITHUB_TOKEN = None
+from .client import get_client
+from .metrics import timed
+from .model import CommitIndex, Timeline
+from .ratelimit import HIGH, LOW, NORMAL
+from .store import get_store
 
-def get_headers():
-    """Get HTTP headers for GitHub API requests."""
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-    if GITHUB_TOKEN:
-        headers['Authorization'] = f'token {GITHUB_TOKEN}'
-    return headers
+# Download counts grow without pushes, so stored totals are refetched at
+# least this often (seconds) even for repositories nobody pushed to
+DOWNLOADS_MAX_AGE = 7 * 24 * 60 * 60
 
-def get_commit_count(repo_name, username):
-    """Get commit count for a specific user in a repository."""
+def fetch_concurrently(func, items, client):
+    """Apply func to every item on a bounded thread pool, keeping input order."""
+    items = list(items)
+    if client.max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=client.max_workers) as executor:
+        return list(executor.map(func, items))
+
+def get_page_number(url):
+    """Read the page query parameter from a pagination link."""
+    return int(parse_qs(urlparse(url).query).get('page', ['1'])[0])
+
+def iter_pages(path, params=None, client=None, priority=NORMAL):
+    """Yield the JSON pages of a paginated endpoint lazily, following Link: next."""
+    client = client or get_client()
+    response = client.get(path, params=params, priority=priority)
+    while True:
+        if response.status_code == 409:  # Empty repository
+            return
+        response.raise_for_status()
+        yield response.json()
+        
+        if 'next' not in response.links:
+            return
+        response = client.get(response.links['next']['url'], priority=priority)
+
+def get_repos(username, client=None, refresh=False):
+    """Fetch every repository of a user, following pagination, once per client."""
+    client = client or get_client()
+    if not refresh and username in client.inventory:
+        return client.inventory[username]
+    
+    repos = [repo
+             for page in iter_pages(f"/users/{username}/repos", {'per_page': 100}, client, HIGH)
+             for repo in page]
+    client.inventory[username] = repos
+    return repos
+
+def get_commit_count(repo_name, username, client=None):
+    """Get commit count for a specific user in a repository, or None if unavailable."""
+    client = client or get_client()
     try:
         # Get commits by the specific user
-        commit_url = f"https://api.github.com/repos/{username}/{repo_name}/commits"
+        commit_url = f"/repos/{username}/{repo_name}/commits"
         params = {
             'author': username,
-            'per_page': 100
+            'per_page': 1
         }
         
-        commits = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(commit_url, params=params, headers=get_headers())
-            response.raise_for_status()
-            
-            page_commits = response.json()
-            if not page_commits:
-                break
-                
-            commits.extend(page_commits)
-            page += 1
-            
-            # Check if we've reached the last page
-            if 'next' not in response.links:
-                break
+        # With one commit per page, the last page number is the commit count
+        response = client.get(commit_url, params=params)
+        if response.status_code == 409:  # Empty repository
+            return 0
+        response.raise_for_status()
         
-        return len(commits)
+        if 'last' in response.links:
+            return get_page_number(response.links['last']['url'])
+        return len(response.json())
         
     except Exception as e:
         print(f"Error counting commits for {repo_name}: {e}")
-        return 0  # Return 0 if any error occurs
+        client.mark_incomplete(username, f"commit count for {username}/{repo_name}: {e}")
+        return None  # Unknown, rather than zero commits
 
-def get_language_stats(username):
+@timed('fetch:language_stats')
+def get_language_stats(username, client=None, store=None):
     """Fetch repository languages weighted by commit count."""
+    client = client or get_client()
     try:
-        api_url = f"https://api.github.com/users/{username}/repos"
-        response = requests.get(api_url, headers=get_headers())
-        response.raise_for_status()
-        repos = response.json()
+        store = store or get_store()
+        repos = [repo for repo in get_repos(username, client)
+                 if isinstance(repo, dict) and repo.get('language')]
         
-        if not isinstance(repos, list):
-            print("Error: Unable to fetch repository data")
-            return {}
-            
-        # Count repositories by their primary language, weighted by commits
-        languages = defaultdict(float)
-        total_weighted_count = 0
+        # Repositories the store holds up to date, e.g. after get_timeline, cost
+        # nothing; the others are counted from pagination metadata in one request
+        # each rather than by syncing their whole history
+        sync_state = store.get_sync_state(username)
+        stored_totals = store.repo_totals(username)
+        
+        def commit_count(repo):
+            name = repo['name']
+            if name in sync_state and sync_state[name][0] == repo.get('pushed_at'):
+                return stored_totals.get(name, 0)
+            return get_commit_count(name, username, client)
         
-        for repo in repos:
-            if isinstance(repo, dict) and repo.get('language'):
-                commit_count = get_commit_count(repo['name'], username)
+        # Sum commits by each repository's primary language; uncounted
+        # repos are already reported as incomplete
+        languages = Counter()
+        for repo, commit_count in zip(repos, fetch_concurrently(commit_count, repos, client)):
+            if commit_count is not None:
                 languages[repo['language']] += commit_count
-                total_weighted_count += commit_count
+        total_weighted_count = sum(languages.values())
         
         # Calculate weighted percentages
         total_weighted_count = total_weighted_count if total_weighted_count > 0 else 1
@@ -79,129 +116,191 @@ def get_language_stats(username):
         
     except requests.RequestException as e:
         print(f"Error fetching data from GitHub: {e}")
+        client.mark_incomplete(username, f"language stats for {username}: {e}")
         return {}
     except Exception as e:
         print(f"Unexpected error: {e}")
         return {}
 
-def get_repo_stats(username):
+def get_download_count(repo_name, username, client=None):
+    """Sum asset download counts over all releases of a repository."""
+    client = client or get_client()
+    try:
+        releases_url = f"/repos/{username}/{repo_name}/releases"
+        releases_response = client.get(releases_url, priority=LOW)
+        releases_response.raise_for_status()
+        releases = releases_response.json()
+        
+        # Sum up download counts from all assets in all releases
+        return sum(asset.get('download_count', 0)
+                   for release in releases
+                   for asset in release.get('assets', []))
+    except Exception as e:
+        client.mark_incomplete(username, f"downloads for {username}/{repo_name}: {e}")
+        return None  # Unknown, rather than zero downloads
+
+def get_repo_stats(username, client=None, store=None):
     """Get total stars and download count for all repositories."""
+    client = client or get_client()
     try:
-        api_url = f"https://api.github.com/users/{username}/repos"
-        response = requests.get(api_url, headers=get_headers())
-        response.raise_for_status()
-        repos = response.json()
-        
-        total_stars = 0
-        total_downloads = 0
-        
-        for repo in repos:
-            if isinstance(repo, dict):
-                # Count stars
-                total_stars += repo.get('stargazers_count', 0)
-                
-                # Get releases for download count
-                releases_url = f"https://api.github.com/repos/{username}/{repo['name']}/releases"
-                try:
-                    releases_response = requests.get(releases_url, headers=get_headers())
-                    releases_response.raise_for_status()
-                    releases = releases_response.json()
-                    
-                    # Sum up download counts from all assets in all releases
-                    for release in releases:
-                        for asset in release.get('assets', []):
-                            total_downloads += asset.get('download_count', 0)
-                except:
-                    continue
+        store = store or get_store()
+        repos = [repo for repo in get_repos(username, client) if isinstance(repo, dict)]
+        
+        # Count stars
+        total_stars = sum(repo.get('stargazers_count', 0) for repo in repos)
+        
+        # Get releases for download count, only for repositories pushed to
+        # since their total was stored, or whose total has grown old
+        stored = store.get_downloads(username)
+        now = time.time()
+        
+        def download_count(repo):
+            name = repo.get('name', '')
+            pushed_at, downloads, fetched_at = stored.get(name, (None, None, 0))
+            if pushed_at == repo.get('pushed_at') and now - fetched_at < DOWNLOADS_MAX_AGE:
+                return downloads
+            downloads = get_download_count(name, username, client)
+            if downloads is not None:
+                store.set_downloads(username, name, repo.get('pushed_at'), downloads)
+            return downloads or 0
+        
+        total_downloads = sum(fetch_concurrently(download_count, repos, client))
         
         return total_stars, total_downloads
         
     except Exception as e:
         print(f"Error fetching repo stats: {e}")
+        client.mark_incomplete(username, f"repo stats for {username}: {e}")
         return 0, 0
 
-def get_repo_timeline(username):
-    """Fetch monthly commit activities since account creation."""
+def iter_commit_pages(repo_name, username, client=None, since=None):
+    """Yield pages of the commits a user authored in a repository, optionally since a timestamp."""
+    params = {'author': username, 'per_page': 100}
+    if since:
+        params['since'] = since
+    return iter_pages(f"/repos/{username}/{repo_name}/commits", params, client)
+
+def _count_days(commits):
+    """Count commits per 'YYYY-MM-DD' day of their author date."""
+    import numpy as np
+    
+    dates = np.array([commit['commit']['author']['date'][:10]
+                      for commit in commits
+                      if isinstance(commit, dict) and 'commit' in commit],
+                     dtype='datetime64[D]')
+    days, counts = np.unique(dates, return_counts=True)
+    return {str(day): int(count) for day, count in zip(days, counts)}
+
+def _scan_commit_pages(pages):
+    """Fold a stream of commit pages into day counts and the newest commit date."""
+    day_counts = Counter()
+    latest = None
+    for page in pages:
+        day_counts.update(_count_days(page))
+        dates = [commit['commit'].get('committer', commit['commit']['author'])['date']
+                 for commit in page if isinstance(commit, dict) and 'commit' in commit]
+        if dates:
+            latest = max(dates + ([latest] if latest else []))
+    return day_counts, latest
+
+def _next_since(latest):
+    """Return the `since` value that excludes every commit up to latest."""
+    latest = datetime.strptime(latest, '%Y-%m-%dT%H:%M:%SZ')
+    return (latest + timedelta(seconds=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def sync_commits(username, client=None, store=None):
+    """Bring the commit store up to date with the user's repositories; return them."""
+    client = client or get_client()
+    store = store or get_store()
+    repos = [repo for repo in get_repos(username, client) if isinstance(repo, dict)]
+    
+    # Only repositories pushed to since the last sync need fetching,
+    # and only for commits newer than what the store already holds
+    sync_state = store.get_sync_state(username)
+    stale_repos = [repo for repo in repos
+                   if repo.get('name', '') not in sync_state
+                   or sync_state[repo.get('name', '')][0] != repo.get('pushed_at')]
+    
+    stored_totals = store.repo_totals(username)
+    
+    def sync_repo(repo):
+        # Stream the new commits page by page, so memory stays at one page
+        name = repo.get('name', '')
+        since = sync_state.get(name, (None, None))[1]
+        replace = False
+        try:
+            day_counts, latest = _scan_commit_pages(
+                iter_commit_pages(name, username, client, since))
+            
+            # `since` filters on committer date, so commits pushed with older
+            # dates (merged branches, same-second commits) or rewritten history
+            # slip past it. Check the total against one cheap count request,
+            # and recount the whole repository when they disagree
+            if since:
+                count = get_commit_count(name, username, client)
+                if count is not None and count != stored_totals.get(name, 0) + sum(day_counts.values()):
+                    day_counts, latest = _scan_commit_pages(
+                        iter_commit_pages(name, username, client))
+                    replace = True
+        except Exception as e:
+            print(f"Error fetching commits for {name}: {e}")
+            client.mark_incomplete(username, f"new commits for {username}/{name}: {e}")
+            return  # Leave the repo unsynced so the next run retries it
+        store.merge(username, name, repo.get('pushed_at'),
+                    _next_since(latest) if latest else since, day_counts, replace)
+    
+    fetch_concurrently(sync_repo, stale_repos, client)
+    store.prune(username, [repo.get('name', '') for repo in repos])
+    return repos
+
+def _sync_index(username, client, store):
+    """Sync the store, then load it as a CommitIndex; return (repos, index)."""
+    repos = sync_commits(username, client, store)
+    return repos, CommitIndex.from_rows(store.daily_counts(username))
+
+def get_commit_index(username, client=None, store=None):
+    """Fetch daily commit counts per repository as a CommitIndex."""
+    client = client or get_client()
+    try:
+        return _sync_index(username, client, store or get_store())[1]
+    except Exception as e:
+        print(f"Error fetching commit index: {e}")
+        client.mark_incomplete(username, f"commit index for {username}: {e}")
+        return CommitIndex()
+
+@timed('fetch:timeline')
+def get_timeline(username, client=None, store=None):
+    """Fetch monthly commit activities since account creation as a Timeline."""
+    client = client or get_client()
     try:
         # Get total stars and downloads first
-        total_stars, total_downloads = get_repo_stats(username)
+        store = store or get_store()
+        total_stars, total_downloads = get_repo_stats(username, client, store)
         
-        # Get user account creation date 
-        user_url = f"https://api.github.com/users/{username}"
-        response = requests.get(user_url, headers=get_headers())
-        response.raise_for_status()
-        user_data = response.json()
-        created_at = datetime.strptime(user_data['created_at'].split('T')[0], '%Y-%m-%d')
+        # Sync new commits into the store, then read back the daily index
+        repos, index = _sync_index(username, client, store)
         
-        # Get all repositories
-        repos_url = f"https://api.github.com/users/{username}/repos"
-        response = requests.get(repos_url, headers=get_headers())
-        response.raise_for_status()
-        repos = response.json()
-        
-        # Group commits by month
-        monthly_data = defaultdict(list)
-        
-        for repo in repos:
-            if isinstance(repo, dict):
-                name = repo.get('name', '')
-                language = repo.get('language', 'Unknown')
-                
-                # Get commits for the repository
-                commits_url = f"https://api.github.com/repos/{username}/{name}/commits"
-                params = {'author': username, 'per_page': 100}
-                
-                try:
-                    commits_response = requests.get(commits_url, params=params, headers=get_headers())
-                    commits_response.raise_for_status()
-                    commits = commits_response.json()
-                    
-                    # Group commits by month
-                    for commit in commits:
-                        if isinstance(commit, dict) and 'commit' in commit:
-                            commit_date = datetime.strptime(
-                                commit['commit']['author']['date'].split('T')[0],
-                                '%Y-%m-%d'
-                            )
-                            month_key = commit_date.strftime('%Y-%m')
-                            
-                            # Add commit to the corresponding month
-                            found = False
-                            for repo_data in monthly_data[month_key]:
-                                if repo_data['name'] == name:
-                                    repo_data['commits'] += 1
-                                    found = True
-                                    break
-                            
-                            if not found:
-                                monthly_data[month_key].append({
-                                    'name': name,
-                                    'commits': 1,
-                                    'language': language
-                                })
-                                
-                except Exception as e:
-                    print(f"Error fetching commits for {name}: {e}")
-                    continue
-        
-        # Transform data into a timeline format
-        timeline_data = []
-        for period in sorted(monthly_data.keys()):
-            repos_in_period = monthly_data[period]
-            if repos_in_period:  # Only include periods with commits
-                timeline_data.append({
-                    'period': period,
-                    'repos': repos_in_period,
-                    'total_commits': sum(r['commits'] for r in repos_in_period),
-                    'languages': list(set(r['language'] for r in repos_in_period))
-                })
-        
-        return {
-            'timeline': timeline_data,
-            'total_stars': total_stars,
-            'total_downloads': total_downloads
-        }
+        # Group the daily counts into monthly periods
+        return Timeline.from_rows(index.monthly_rows(), repos,
+                                  total_stars, total_downloads)
         
     except Exception as e:
         print(f"Error fetching timeline data: {e}")
-        return {'timeline': [], 'total_stars': 0, 'total_downloads': 0}
+        client.mark_incomplete(username, f"timeline for {username}: {e}")
+        return Timeline()
+
+def get_repo_timeline(username, client=None, store=None):
+    """Fetch monthly commit activities since account creation."""
+    return get_timeline(username, client, store).to_dict()
+
+def get_incomplete(client=None, username=None):
+    """List the data that could not be fetched through a client so far, for one user or all."""
+    client = client or get_client()
+    if username is not None:
+        return list(client.incomplete.get(username, []))
+    return [note for notes in list(client.incomplete.values()) for note in notes]
+
+def forget_user(username, client=None, store=None):
+    """Drop everything kept about a user: listings, notes and stored commit counts."""
+    (client or get_client()).forget(username)
+    (store or get_store()).forget(username)
@@ -0,0 +1,210 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from .client import get_client
+from .metrics import timed
+from .model import CommitIndex, Timeline
+from .ratelimit import HIGH
+
+# The REST backend makes one or more calls per repository; these queries
+# fetch 100 repositories, or several quarters of commit activity, per call.
+RELEASES_PER_REPO = 30    # the first page of the REST releases endpoint
+ASSETS_PER_RELEASE = 50
+WINDOWS_PER_QUERY = 8     # contribution windows requested in one call
+MAX_REPOSITORIES = 100    # repositories listed per contribution window
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+USER_QUERY = '''
+query User($login: String!) {
+  user(login: $login) { createdAt }
+}'''
+
+REPOSITORIES_QUERY = '''
+query Repositories($login: String!, $cursor: String) {
+  user(login: $login) {
+    repositories(first: 100, after: $cursor, ownerAffiliations: OWNER, privacy: PUBLIC,
+                 orderBy: {field: NAME, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        pushedAt
+        stargazerCount
+        primaryLanguage { name }
+        releases(first: %d) { nodes { releaseAssets(first: %d) { nodes { downloadCount } } } }
+      }
+    }
+  }
+}''' % (RELEASES_PER_REPO, ASSETS_PER_RELEASE)
+
+CONTRIBUTIONS_WINDOW = '''
+    q%(i)d: contributionsCollection(from: $from%(i)d, to: $to%(i)d) {
+      commitContributionsByRepository(maxRepositories: %(max)d) {
+        repository { name owner { login } }
+        contributions(first: 100) { nodes { occurredAt commitCount } }
+      }
+    }'''
+
+def contributions_query(count):
+    """Build a query fetching commit contributions for count date windows at once."""
+    params = ', '.join(f'$from{i}: DateTime!, $to{i}: DateTime!' for i in range(count))
+    fields = ''.join(CONTRIBUTIONS_WINDOW % {'i': i, 'max': MAX_REPOSITORIES} for i in range(count))
+    return f'query Contributions($login: String!, {params}) {{\n  user(login: $login) {{{fields}\n  }}\n}}'
+
+def get_user(username, client=None):
+    """Fetch a user's account creation date, once per client."""
+    client = client or get_client()
+    key = ('graphql-user', username)
+    if key not in client.inventory:
+        client.inventory[key] = client.post_graphql(USER_QUERY, {'login': username}, HIGH)['user']
+    return client.inventory[key]
+
+def get_repos(username, client=None, refresh=False):
+    """Fetch every public repository a user owns, 100 per query, once per client."""
+    client = client or get_client()
+    key = ('graphql', username)  # Kept apart from the REST listing
+    if not refresh and key in client.inventory:
+        return client.inventory[key]
+
+    variables = {'login': username, 'cursor': None}
+    repos = []
+    while True:
+        page = client.post_graphql(REPOSITORIES_QUERY, variables, HIGH)['user']['repositories']
+        repos.extend(page['nodes'])
+        if not page['pageInfo']['hasNextPage']:
+            break
+        variables['cursor'] = page['pageInfo']['endCursor']
+    client.inventory[key] = repos
+    return repos
+
+def as_rest_repo(node):
+    """Convert a repository node into the fields the REST listing provides."""
+    return {
+        'name': node['name'],
+        'language': (node.get('primaryLanguage') or {}).get('name'),
+        'stargazers_count': node.get('stargazerCount', 0),
+        'pushed_at': node.get('pushedAt')
+    }
+
+def get_download_count(node):
+    """Sum asset download counts over a repository's releases."""
+    return sum(asset['downloadCount']
+               for release in node['releases']['nodes']
+               for asset in release['releaseAssets']['nodes'])
+
+def get_repo_stats(username, client=None):
+    """Get total stars and download count for all repositories."""
+    client = client or get_client()
+    try:
+        repos = get_repos(username, client)
+        return (sum(repo['stargazerCount'] for repo in repos),
+                sum(get_download_count(repo) for repo in repos))
+    except Exception as e:
+        print(f"Error fetching repo stats: {e}")
+        client.mark_incomplete(username, f"repo stats for {username}: {e}")
+        return 0, 0
+
+@timed('fetch:language_stats')
+def get_language_stats(username, client=None):
+    """Fetch repository languages weighted by commit count."""
+    client = client or get_client()
+    try:
+        repos = [as_rest_repo(node) for node in get_repos(username, client)]
+        languages = _load_index(username, client).language_weights(
+            {repo['name']: repo['language'] for repo in repos if repo['language']})
+        total_weighted_count = sum(languages.values())
+
+        total_weighted_count = total_weighted_count if total_weighted_count > 0 else 1
+        return {lang: round((count/total_weighted_count) * 100, 2)
+                for lang, count in sorted(languages.items(), key=lambda x: x[1], reverse=True)}
+    except Exception as e:
+        print(f"Error fetching data from GitHub: {e}")
+        client.mark_incomplete(username, f"language stats for {username}: {e}")
+        return {}
+
+def parse_date(timestamp):
+    return datetime.strptime(timestamp, DATE_FORMAT).replace(tzinfo=timezone.utc)
+
+def windows(start, end, months=3):
+    """Yield (from, to) timestamps of calendar windows covering start..end.
+
+    Three-month windows are calendar quarters; a quarter has at most 92 days,
+    so one page of daily contributions covers a whole window.
+    """
+    window = datetime(start.year, start.month - (start.month - 1) % months, 1, tzinfo=timezone.utc)
+    while window <= end:
+        month = window.month - 1 + months
+        following = window.replace(year=window.year + month // 12, month=month % 12 + 1)
+        yield (window.strftime(DATE_FORMAT),
+               (following - timedelta(seconds=1)).strftime(DATE_FORMAT))
+        window = following
+
+def get_daily_counts(username, created_at, client=None):
+    """Return (day, repo, commits) rows for the user's own repositories, once per client."""
+    client = client or get_client()
+    key = ('graphql-days', username)
+    if key in client.inventory:
+        return client.inventory[key]
+    pending = list(windows(parse_date(created_at), datetime.now(timezone.utc)))
+
+    counts = Counter()
+    while pending:
+        batch, pending = pending[:WINDOWS_PER_QUERY], pending[WINDOWS_PER_QUERY:]
+        variables = {'login': username}
+        for i, (start, end) in enumerate(batch):
+            variables[f'from{i}'], variables[f'to{i}'] = start, end
+        user = client.post_graphql(contributions_query(len(batch)), variables)['user']
+
+        for i, (start, end) in enumerate(batch):
+            by_repo = user[f'q{i}']['commitContributionsByRepository']
+            if len(by_repo) >= MAX_REPOSITORIES:
+                # Only the most active repositories are listed; retry month by month
+                if start[:7] != end[:7]:
+                    pending.extend(windows(parse_date(start), parse_date(end), months=1))
+                    continue
+                client.mark_incomplete(username, f"commits of {username} in {start[:7]}: "
+                                       f"over {MAX_REPOSITORIES} active repositories")
+            for entry in by_repo:
+                repo = entry['repository']
+                if repo['owner']['login'].lower() != username.lower():
+                    continue  # Contributions to other people's repositories
+                for day in entry['contributions']['nodes']:
+                    counts[day['occurredAt'][:10], repo['name']] += day['commitCount']
+
+    client.inventory[key] = [(day, repo, commits) for (day, repo), commits in counts.items()]
+    return client.inventory[key]
+
+def _load_index(username, client):
+    created_at = get_user(username, client)['createdAt']
+    return CommitIndex.from_rows(get_daily_counts(username, created_at, client))
+
+def get_commit_index(username, client=None):
+    """Fetch daily commit counts per repository as a CommitIndex."""
+    client = client or get_client()
+    try:
+        return _load_index(username, client)
+    except Exception as e:
+        print(f"Error fetching commit index: {e}")
+        client.mark_incomplete(username, f"commit index for {username}: {e}")
+        return CommitIndex()
+
+@timed('fetch:timeline')
+def get_timeline(username, client=None):
+    """Fetch monthly commit activities since account creation as a Timeline."""
+    client = client or get_client()
+    try:
+        total_stars, total_downloads = get_repo_stats(username, client)
+        repos = [as_rest_repo(node) for node in get_repos(username, client)]
+        return Timeline.from_rows(_load_index(username, client).monthly_rows(), repos,
+                                  total_stars, total_downloads)
+    except Exception as e:
+        print(f"Error fetching timeline data: {e}")
+        client.mark_incomplete(username, f"timeline for {username}: {e}")
+        return Timeline()
+
+def get_repo_timeline(username, client=None):
+    """Fetch monthly commit activities since account creation."""
+    return get_timeline(username, client).to_dict()
+
+def forget_user(username, client=None):
+    """Drop everything kept about a user: listings, contributions and notes."""
+    (client or get_client()).forget(username)
@@ -0,0 +1,131 @@
+import functools
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+SLOWEST = 5  # calls listed in the report
+MAX_RECORDS = 100000  # newest calls and steps kept, so long-running processes stay bounded
+
+def endpoint_of(path):
+    """Collapse a request path into its endpoint, e.g. /repos/:owner/:repo/commits."""
+    path = re.sub(r'^https?://[^/]+', '', path).split('?')[0]
+    path = re.sub(r'^/repos/[^/]+/[^/]+', '/repos/:owner/:repo', path)
+    return re.sub(r'^/users/[^/]+', '/users/:user', path)
+
+class Recorder:
+    """Collect API call and step timings for one run."""
+
+    def __init__(self, max_records=MAX_RECORDS):
+        self.max_records = max_records
+        self.lock = threading.Lock()
+        self.hooks = []  # callables receiving every call and step record
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = deque(maxlen=self.max_records)
+            self.steps = deque(maxlen=self.max_records)
+
+    def record_call(self, url, status, size, latency, cache=None, rate_remaining=None):
+        """Record one API call; status 0 means it failed without a response.
+
+        cache is None when the client has no cache, else 'hit', 'revalidated' or 'miss'.
+        """
+        record = {'kind': 'call', 'url': url, 'endpoint': endpoint_of(url),
+                  'status': status, 'bytes': size, 'latency': latency,
+                  'cache': cache, 'rate_remaining': rate_remaining}
+        with self.lock:
+            self.calls.append(record)
+        self._notify(record)
+
+    def record_step(self, name, seconds):
+        record = {'kind': 'step', 'name': name, 'seconds': seconds}
+        with self.lock:
+            self.steps.append(record)
+        self._notify(record)
+
+    def _notify(self, record):
+        for hook in list(self.hooks):
+            hook(record)
+
+    @contextmanager
+    def step(self, name):
+        """Time the enclosed block as a named step."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_step(name, time.perf_counter() - start)
+
+    def summary(self, slowest=SLOWEST):
+        """Totals per endpoint and step, plus the slowest calls."""
+        with self.lock:
+            calls, steps = list(self.calls), list(self.steps)
+
+        endpoints = defaultdict(lambda: {'calls': 0, 'bytes': 0, 'latency': 0.0,
+                                         'cache_hits': 0, 'errors': 0})
+        for call in calls:
+            totals = endpoints[call['endpoint']]
+            totals['calls'] += 1
+            totals['bytes'] += call['bytes']
+            totals['latency'] += call['latency']
+            totals['cache_hits'] += call['cache'] in ('hit', 'revalidated')
+            totals['errors'] += not 200 <= call['status'] < 400
+
+        step_totals = defaultdict(lambda: {'count': 0, 'seconds': 0.0})
+        for step in steps:
+            step_totals[step['name']]['count'] += 1
+            step_totals[step['name']]['seconds'] += step['seconds']
+
+        remaining = [call['rate_remaining'] for call in calls if call['rate_remaining'] is not None]
+        return {
+            'calls': len(calls),
+            'network_calls': sum(call['cache'] != 'hit' for call in calls),
+            'cache_hits': sum(call['cache'] in ('hit', 'revalidated') for call in calls),
+            'bytes': sum(call['bytes'] for call in calls),
+            'latency': round(sum(call['latency'] for call in calls), 3),
+            'rate_remaining': remaining[-1] if remaining else None,
+            'endpoints': {name: dict(totals, latency=round(totals['latency'], 3))
+                          for name, totals in sorted(endpoints.items())},
+            'steps': {name: dict(totals, seconds=round(totals['seconds'], 3))
+                      for name, totals in step_totals.items()},
+            'slowest': [{key: call[key] for key in ('url', 'status', 'latency', 'cache')}
+                        for call in sorted(calls, key=lambda c: c['latency'], reverse=True)[:slowest]]
+        }
+
+    def format_report(self, slowest=SLOWEST):
+        """Render summary() as a plain-text table."""
+        summary = self.summary(slowest)
+        lines = [f"API calls: {summary['calls']} ({summary['network_calls']} over the network, "
+                 f"{summary['cache_hits']} cache hits), {summary['bytes']:,} bytes, "
+                 f"{summary['latency']:.2f}s total latency, "
+                 f"rate limit remaining: {summary['rate_remaining']}"]
+        if summary['endpoints']:
+            width = max(len(name) for name in summary['endpoints'])
+            lines.append(f"{'endpoint':<{width}}  calls  cached  errors  latency")
+            lines += [f"{name:<{width}}  {t['calls']:>5}  {t['cache_hits']:>6}  {t['errors']:>6}  "
+                      f"{t['latency']:>6.2f}s" for name, t in summary['endpoints'].items()]
+        if summary['steps']:
+            width = max(len(name) for name in summary['steps'])
+            lines.append(f"{'step':<{width}}  count  seconds")
+            lines += [f"{name:<{width}}  {t['count']:>5}  {t['seconds']:>7.2f}"
+                      for name, t in summary['steps'].items()]
+        if summary['slowest']:
+            lines.append("Slowest calls:")
+            lines += [f"  {call['latency']:.3f}s  {call['status']}  {call['url']}"
+                      for call in summary['slowest']]
+        return '\n'.join(lines)
+
+RECORDER = Recorder()
+
+def timed(name):
+    """Decorator recording each call of a function as a step on RECORDER."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with RECORDER.step(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,239 @@
+from array import array
+
+class Timeline:
+    """Monthly commit timeline stored as columns with interned repo and language IDs.
+
+    Row i says repository repo_names[repo_ids[i]] made commits[i] commits in
+    periods[period_ids[i]]. Rows are sorted by period, then by the order the
+    repositories were listed in. to_dict() returns the nested dict shape that
+    get_repo_timeline has always returned.
+    """
+
+    __slots__ = ('periods', 'repo_names', 'language_names', 'repo_languages',
+                 'period_ids', 'repo_ids', 'commits', 'total_stars', 'total_downloads')
+
+    def __init__(self, total_stars=0, total_downloads=0):
+        self.periods = []         # 'YYYY-MM', ascending
+        self.repo_names = []      # repo ID -> name
+        self.language_names = []  # language ID -> name
+        self.repo_languages = array('i')  # repo ID -> language ID
+        self.period_ids = array('i')
+        self.repo_ids = array('i')
+        self.commits = array('i')
+        self.total_stars = total_stars
+        self.total_downloads = total_downloads
+
+    def __len__(self):
+        return len(self.periods)
+
+    def _intern_repo(self, name, language, repo_ids, language_ids):
+        if name not in repo_ids:
+            repo_ids[name] = len(self.repo_names)
+            self.repo_names.append(name)
+            if language not in language_ids:
+                language_ids[language] = len(self.language_names)
+                self.language_names.append(language)
+            self.repo_languages.append(language_ids[language])
+        return repo_ids[name]
+
+    @classmethod
+    def from_rows(cls, rows, repos, total_stars=0, total_downloads=0):
+        """Build from (month, repo, commits) rows, ordering repos as listed in repos."""
+        import numpy as np
+
+        timeline = cls(total_stars, total_downloads)
+        listing = {}
+        for repo in repos:
+            listing.setdefault(repo.get('name', ''), repo.get('language') or 'Unknown')
+        listing_order = {name: i for i, name in enumerate(listing)}
+
+        rows = [row for row in rows if row[1] in listing_order]
+        if not rows:
+            return timeline
+
+        # Index every row by month and listing position, then sort once
+        months, month_idx = np.unique([row[0] for row in rows], return_inverse=True)
+        listing_idx = np.array([listing_order[row[1]] for row in rows])
+        commits = np.array([row[2] for row in rows])
+        order = np.lexsort((listing_idx, month_idx))
+
+        # Intern repositories with commits in listing order
+        names = list(listing)
+        repo_ids, language_ids = {}, {}
+        present = np.unique(listing_idx)
+        for i in present:
+            timeline._intern_repo(names[i], listing[names[i]], repo_ids, language_ids)
+
+        timeline.periods = [str(month) for month in months]
+        timeline.period_ids = array('i', month_idx[order].tolist())
+        timeline.repo_ids = array('i', np.searchsorted(present, listing_idx[order]).tolist())
+        timeline.commits = array('i', commits[order].tolist())
+        return timeline
+
+    @classmethod
+    def from_dict(cls, timeline_data):
+        """Build from the nested dict shape returned by get_repo_timeline."""
+        timeline = cls(timeline_data.get('total_stars', 0),
+                       timeline_data.get('total_downloads', 0))
+        repo_ids, language_ids = {}, {}
+        for period_data in timeline_data.get('timeline', []):
+            if not period_data['repos']:
+                continue
+            period_id = len(timeline.periods)
+            timeline.periods.append(period_data['period'])
+            for repo in period_data['repos']:
+                timeline.period_ids.append(period_id)
+                timeline.repo_ids.append(timeline._intern_repo(
+                    repo['name'], repo['language'], repo_ids, language_ids))
+                timeline.commits.append(repo['commits'])
+        return timeline
+
+    @classmethod
+    def coerce(cls, timeline_data):
+        """Accept a Timeline or its dict form; return None for anything else."""
+        if isinstance(timeline_data, cls):
+            return timeline_data
+        if isinstance(timeline_data, dict) and timeline_data:
+            return cls.from_dict(timeline_data)
+        return None
+
+    def repo_language(self, repo_id):
+        return self.language_names[self.repo_languages[repo_id]]
+
+    def repo_totals(self):
+        """Total commits per repository name, in repo ID order."""
+        totals = [0] * len(self.repo_names)
+        for repo_id, commits in zip(self.repo_ids, self.commits):
+            totals[repo_id] += commits
+        return dict(zip(self.repo_names, totals))
+
+    def to_dict(self):
+        """Expand into the nested {'timeline': [...], ...} dict shape."""
+        periods = [[] for _ in self.periods]
+        for period_id, repo_id, commits in zip(self.period_ids, self.repo_ids, self.commits):
+            periods[period_id].append({
+                'name': self.repo_names[repo_id],
+                'commits': commits,
+                'language': self.repo_language(repo_id)
+            })
+
+        timeline_data = []
+        for period, repos_in_period in zip(self.periods, periods):
+            if repos_in_period:  # Only include periods with commits
+                timeline_data.append({
+                    'period': period,
+                    'repos': repos_in_period,
+                    'total_commits': sum(r['commits'] for r in repos_in_period),
+                    'languages': list(dict.fromkeys(r['language'] for r in repos_in_period))
+                })
+
+        return {
+            'timeline': timeline_data,
+            'total_stars': self.total_stars,
+            'total_downloads': self.total_downloads
+        }
+
+class CommitIndex:
+    """Daily commit counts with one NumPy array per repository.
+
+    counts[i] holds the commits made to repo_names[i] on each day from
+    starts[i] on, so every array only spans the days its repository was
+    active. The monthly timeline and language weights are reductions of it.
+    """
+
+    __slots__ = ('repo_names', 'starts', 'counts')
+
+    def __init__(self):
+        self.repo_names = []
+        self.starts = []  # datetime64[D] of each array's first day
+        self.counts = []  # int32 commits per day
+
+    def __len__(self):
+        return len(self.repo_names)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (day, repo, commits) rows in any order."""
+        import numpy as np
+
+        index = cls()
+        if not rows:
+            return index
+        days = np.array([row[0] for row in rows], dtype='datetime64[D]')
+        names, repo_idx = np.unique([row[1] for row in rows], return_inverse=True)
+        commits = np.array([row[2] for row in rows], dtype=np.int32)
+
+        # Sort by repo then day, and cut the columns into one run per repo
+        order = np.lexsort((days, repo_idx))
+        days, commits = days[order], commits[order]
+        cuts = np.flatnonzero(np.diff(repo_idx[order])) + 1
+        for name, repo_days, repo_commits in zip(names, np.split(days, cuts),
+                                                 np.split(commits, cuts)):
+            offsets = (repo_days - repo_days[0]).astype(int)
+            index.repo_names.append(str(name))
+            index.starts.append(repo_days[0])
+            index.counts.append(np.bincount(offsets, weights=repo_commits).astype(np.int32))
+        return index
+
+    def span(self):
+        """Return the first and last day with commits, or (None, None) if empty."""
+        if not self.repo_names:
+            return None, None
+        return (min(self.starts),
+                max(start + len(counts) - 1 for start, counts in zip(self.starts, self.counts)))
+
+    def daily_totals(self, start=None, end=None):
+        """Return (start, commits per day over all repositories) up to end inclusive."""
+        import numpy as np
+
+        first, last = self.span()
+        start = np.datetime64(start if start is not None else first, 'D')
+        end = np.datetime64(end if end is not None else last, 'D')
+        totals = np.zeros(max(int((end - start).astype(int)) + 1, 0), dtype=np.int64)
+        for repo_start, counts in zip(self.starts, self.counts):
+            # Overlap of the repo's array with the requested range, in its own offsets
+            lo = max(int((start - repo_start).astype(int)), 0)
+            hi = min(int((end - repo_start).astype(int)) + 1, len(counts))
+            if lo < hi:
+                offset = int((repo_start - start).astype(int))
+                totals[offset + lo:offset + hi] += counts[lo:hi]
+        return start, totals
+
+    def monthly_rows(self):
+        """Return (month, repo, commits) rows, ordered by month, for Timeline.from_rows."""
+        import numpy as np
+
+        rows = []
+        for name, start, counts in zip(self.repo_names, self.starts, self.counts):
+            months = (start + np.arange(len(counts))).astype('datetime64[M]')
+            unique_months, month_idx = np.unique(months, return_inverse=True)
+            sums = np.bincount(month_idx, weights=counts)
+            rows += [(str(month), name, int(total))
+                     for month, total in zip(unique_months, sums) if total]
+        rows.sort(key=lambda row: row[0])
+        return rows
+
+    def repo_totals(self):
+        """Total commits per repository name."""
+        return {name: int(counts.sum()) for name, counts in zip(self.repo_names, self.counts)}
+
+    def language_weights(self, repo_languages):
+        """Sum commits per language, given repo name -> language.
+
+        Every language in repo_languages appears, in order of first appearance.
+        """
+        import numpy as np
+
+        totals = self.repo_totals()
+        languages = list(dict.fromkeys(repo_languages.values()))
+        language_ids = {language: i for i, language in enumerate(languages)}
+        weights = np.bincount(np.array([language_ids[language]
+                                        for language in repo_languages.values()], dtype=int),
+                              weights=[totals.get(name, 0) for name in repo_languages],
+                              minlength=len(languages))
+        return {language: int(weight) for language, weight in zip(languages, weights)}
+
+    def to_dict(self):
+        """Expand into {'repos': {name: {'start': 'YYYY-MM-DD', 'counts': [...]}}}."""
+        return {'repos': {name: {'start': str(start), 'counts': counts.tolist()}
+                          for name, start, counts in zip(self.repo_names, self.starts, self.counts)}}
@@ -0,0 +1,28 @@
+import os
+
+# dpi applies to raster output, scale sizes the fast word cloud bitmap, and
+# fast_wordcloud is the word cloud mode chart_jobs picks by default
+PROFILES = {
+    'preview': {'format': 'png', 'dpi': 72, 'scale': 1, 'fast_wordcloud': True},
+    'print': {'format': 'png', 'dpi': 300, 'scale': 2, 'fast_wordcloud': False},
+    'svg': {'format': 'svg', 'dpi': 72, 'scale': 1, 'fast_wordcloud': False},
+    'pdf': {'format': 'pdf', 'dpi': 300, 'scale': 2, 'fast_wordcloud': False}
+}
+DEFAULT_PROFILE = 'print'
+FORMATS = ('png', 'svg', 'pdf')
+
+def get_profile(profile=DEFAULT_PROFILE):
+    """Return the settings of a named render profile."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown render profile {profile!r}, expected one of {', '.join(PROFILES)}")
+    return PROFILES[profile]
+
+def output_format(path, profile=DEFAULT_PROFILE):
+    """Pick the output format: a file path's extension wins over the profile's."""
+    if isinstance(path, str):
+        extension = os.path.splitext(path)[1].lstrip('.').lower()
+        if extension:
+            if extension not in FORMATS:
+                raise ValueError(f"Unsupported chart format {extension!r}, expected one of {', '.join(FORMATS)}")
+            return extension
+    return get_profile(profile)['format']
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import requests
+
+# Request priorities; lower values are served first when the budget runs low
+HIGH, NORMAL, LOW = 0, 1, 2
+
+# Remaining-call reserve below which a priority waits for the reset
+RESERVE = {HIGH: 0, NORMAL: 10, LOW: 50}
+MAX_WAIT = 15 * 60  # give up instead of sleeping longer than this (seconds)
+MAX_ATTEMPTS = 3    # tries per request when hitting primary/secondary limits
+SECONDARY_BACKOFF = 60
+
+class RateLimitExceeded(requests.RequestException):
+    """The rate limit cannot be waited out within MAX_WAIT."""
+
+class RateLimitScheduler:
+    """Track the GitHub API budget and hold requests back until it allows them."""
+
+    def __init__(self, reserve=RESERVE, max_wait=MAX_WAIT, max_attempts=MAX_ATTEMPTS):
+        self.reserve = dict(reserve)
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self.condition = threading.Condition()
+
+        self.limit = None
+        self.remaining = None  # None until the first response tells us
+        self.reset_at = 0.0
+        self.resume_at = 0.0   # pause requested by a secondary limit
+        self.used = 0
+        self.waited = 0.0
+
+    def _wait_time(self, priority, now):
+        if self.resume_at > now:
+            return self.resume_at - now
+        if self.remaining is not None and self.remaining <= self.reserve.get(priority, 0):
+            if self.reset_at > now:
+                return self.reset_at - now
+            self.remaining = None  # The window has reset; the next response refills it
+        return 0
+
+    def acquire(self, priority=NORMAL):
+        """Block until a request of this priority fits the remaining budget."""
+        with self.condition:
+            while True:
+                now = time.time()
+                wait = self._wait_time(priority, now)
+                if wait <= 0:
+                    break
+                if wait > self.max_wait:
+                    raise RateLimitExceeded(
+                        f"Rate limit resets in {wait:.0f}s, longer than the {self.max_wait}s limit")
+                self.condition.wait(wait)
+                self.waited += time.time() - now
+
+            # Account for the call before its response arrives
+            if self.remaining is not None:
+                self.remaining -= 1
+            self.used += 1
+
+    def update(self, response):
+        """Record budget headers; return True if the request should be retried."""
+        headers = response.headers
+        now = time.time()
+        with self.condition:
+            if 'X-RateLimit-Remaining' in headers:
+                self.remaining = int(headers['X-RateLimit-Remaining'])
+                self.limit = int(headers.get('X-RateLimit-Limit', self.limit or 0))
+                self.reset_at = float(headers.get('X-RateLimit-Reset', self.reset_at))
+
+            limited = response.status_code == 429 or (
+                response.status_code == 403
+                and (self.remaining == 0 or 'Retry-After' in headers))
+            if limited:
+                if 'Retry-After' in headers:
+                    self.resume_at = now + float(headers['Retry-After'])
+                elif self.remaining == 0:
+                    self.resume_at = self.reset_at
+                else:
+                    self.resume_at = now + SECONDARY_BACKOFF
+            self.condition.notify_all()
+        return limited
+
+    def summary(self):
+        return {'limit': self.limit, 'remaining': self.remaining,
+                'reset_at': self.reset_at, 'used': self.used,
+                'waited': round(self.waited, 2)}
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .metrics import RECORDER
+from .profiles import DEFAULT_PROFILE, get_profile
+from .visualize import (create_contribution_heatmap, create_language_pie, create_repo_timeline,
+                        create_repo_wordcloud)
+
+RENDER_WORKERS = os.cpu_count() or 1
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+CHART_NAMES = ('language_distribution', 'repo_timeline', 'repo_wordcloud',
+               'contribution_heatmap')
+
+def _run_job(renderer, data, path, params):
+    # Timed inside the worker so queueing in the pool is not counted
+    start = time.perf_counter()
+    return renderer(data, path, **params), time.perf_counter() - start
+
+def chart_files(profile=DEFAULT_PROFILE):
+    """File names of one resume's charts when rendered with a profile."""
+    return [f"{name}.{get_profile(profile)['format']}" for name in CHART_NAMES]
+
+def chart_jobs(language_stats, repo_timeline, output_dir='.', profile=DEFAULT_PROFILE,
+               commit_index=None, fast_wordcloud=None):
+    """List the (renderer, data, path, params) jobs that make up one resume.
+
+    The contribution heatmap is only included when a commit_index is given.
+    fast_wordcloud=None uses the profile's word cloud mode.
+    """
+    if fast_wordcloud is None:
+        fast_wordcloud = get_profile(profile)['fast_wordcloud']
+    renderers = [(create_language_pie, language_stats, {}),
+                 (create_repo_timeline, repo_timeline, {}),
+                 (create_repo_wordcloud, repo_timeline, {'fast': fast_wordcloud}),
+                 (create_contribution_heatmap, commit_index, {})]
+    return [(renderer, data, os.path.join(output_dir, name), dict(params, profile=profile))
+            for (renderer, data, params), name in zip(renderers, chart_files(profile))
+            if data is not None]
+
+class RenderPool:
+    """Process pool that renders charts in parallel, one chart per task."""
+
+    def __init__(self, workers=RENDER_WORKERS):
+        # Spawned workers do not inherit locks held by fetch threads
+        self.executor = ProcessPoolExecutor(max_workers=max(1, workers),
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_init_worker)
+
+    def submit(self, renderer, data, path, params=None):
+        future = self.executor.submit(_run_job, renderer, data, path, params or {})
+        future.step = f'render:{renderer.__name__}'
+        return future
+
+    @staticmethod
+    def result(future):
+        """Return a rendered path, or None if the renderer failed."""
+        try:
+            path, seconds = future.result()
+        except Exception as e:
+            print(f"Error rendering chart: {e}")
+            return None
+        RECORDER.record_step(future.step, seconds)
+        return path
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def render_charts(jobs, workers=RENDER_WORKERS):
+    """Render (renderer, data, path, params) jobs and return the results in job order."""
+    jobs = list(jobs)
+    if workers <= 1 or len(jobs) <= 1:
+        paths = []
+        for renderer, data, path, params in jobs:
+            with RECORDER.step(f'render:{renderer.__name__}'):
+                paths.append(renderer(data, path, **params))
+        return paths
+
+    with RenderPool(min(workers, len(jobs))) as pool:
+        futures = [pool.submit(*job) for job in jobs]
+        return [pool.result(future) for future in futures]
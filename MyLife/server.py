@@ -0,0 +1,317 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from . import github_stats, graphql
+from .batch import fetch_user_stats, write_user_stats
+from .cache import CACHE_DIR, HTTP_CACHE_TTL, ResponseCache
+from .client import MAX_WORKERS, GitHubClient
+from .profiles import PROFILES
+from .render import RENDER_WORKERS, RenderPool, chart_files, chart_jobs
+
+REFRESH_INTERVAL = 60 * 60  # seconds before a user's charts are rebuilt
+SCHEDULE_INTERVAL = 60      # seconds between scans for stale users
+REFRESH_WORKERS = 2         # users rebuilt at the same time
+MEMORY_USERS = 256          # users whose files are held in memory
+DISK_USERS = 10000          # users whose files are kept on disk
+RETRY_AFTER = 10            # seconds a client should wait for a first build
+SERVER_PROFILE = 'preview'  # embedded charts do not need print resolution
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf'
+}
+USERNAME = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})$')
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        # Only serve what is already built; fetching and rendering happen elsewhere
+        resume = self.server.resume
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if len(parts) != 2 or not USERNAME.match(parts[0]) or parts[1] not in resume.files:
+            return self._send_json({'message': 'Not Found'}, 404)
+        username, name = parts[0].lower(), parts[1]
+
+        entry = resume.lookup(username)
+        if entry is None:
+            resume.request_refresh(username)
+            return self._send_json({'message': f'Building charts for {username}'}, 202,
+                                   {'Retry-After': str(RETRY_AFTER)})
+        if resume.is_stale(entry):
+            resume.request_refresh(username)  # Serve the old files meanwhile
+        if name not in entry['files']:
+            return self._send_json({'message': 'Not Found'}, 404)
+
+        etag = entry['etags'][name]
+        headers = {'ETag': etag, 'Cache-Control': f'public, max-age={SCHEDULE_INTERVAL}'}
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, b'', None, headers)
+        self._send(200, entry['files'][name], resume.files[name], headers)
+
+    def _send_json(self, payload, status=200, headers=None):
+        self._send(status, json.dumps(payload).encode(), 'application/json', headers)
+
+    def _send(self, status, body, content_type=None, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+class ResumeServer:
+    """HTTP service serving each user's stats and charts, rebuilt in the background."""
+
+    def __init__(self, host='127.0.0.1', port=8000, output_dir=None, client=None,
+                 backend=github_stats, refresh_interval=REFRESH_INTERVAL,
+                 refresh_workers=REFRESH_WORKERS, render_workers=RENDER_WORKERS,
+                 memory_users=MEMORY_USERS, disk_users=DISK_USERS, profile=SERVER_PROFILE,
+                 fast_wordcloud=None):
+        self.output_dir = output_dir or os.path.join(CACHE_DIR, 'server')
+        # Cached responses must expire by the time a user is due for a refresh
+        self.client = client or GitHubClient(
+            pool_size=refresh_workers * MAX_WORKERS,
+            cache=ResponseCache(ttl=min(HTTP_CACHE_TTL, refresh_interval)))
+        self.backend = backend
+        self.refresh_interval = refresh_interval
+        self.refresh_workers = refresh_workers
+        self.render_workers = render_workers
+        self.memory_users = memory_users
+        self.disk_users = disk_users
+        self.profile = profile
+        self.fast_wordcloud = fast_wordcloud
+
+        # Served file name -> content type
+        self.files = {name: CONTENT_TYPES[name.rsplit('.', 1)[1]]
+                      for name in ['stats.json'] + chart_files(profile)}
+
+        # username -> {'files', 'etags', 'updated_at'}, least recently used first
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.queued = set()
+        self.stopping = threading.Event()
+        self.threads = []
+        self.render_pool = None
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.resume = self
+        self.url = f'http://{host}:{self.httpd.server_address[1]}'
+
+    def lookup(self, username):
+        """Return a user's built files from memory or disk, or None if never built."""
+        with self.lock:
+            if username in self.memory:
+                self.memory.move_to_end(username)
+                return self.memory[username]
+        entry = self._load(username)
+        if entry is not None:
+            self._remember(username, entry)
+        return entry
+
+    def is_stale(self, entry):
+        return time.time() - entry['updated_at'] > self.refresh_interval
+
+    def _load(self, username):
+        directory = os.path.join(self.output_dir, username)
+        try:
+            updated_at = os.path.getmtime(os.path.join(directory, 'stats.json'))
+        except OSError:
+            return None
+
+        files = {}
+        for name in self.files:
+            try:
+                with open(os.path.join(directory, name), 'rb') as f:
+                    files[name] = f.read()
+            except FileNotFoundError:
+                pass  # e.g. no chart for an account without repositories
+        return {
+            'files': files,
+            'etags': {name: f'"{hashlib.sha1(body).hexdigest()}"' for name, body in files.items()},
+            'updated_at': updated_at
+        }
+
+    def _remember(self, username, entry):
+        with self.lock:
+            self.memory[username] = entry
+            self.memory.move_to_end(username)
+            while len(self.memory) > self.memory_users:
+                self.memory.popitem(last=False)
+
+    def request_refresh(self, username):
+        """Queue a rebuild of a user unless one is already queued or running."""
+        with self.lock:
+            if username in self.queued:
+                return
+            self.queued.add(username)
+        self.queue.put(username)
+
+    def refresh(self, username):
+        """Fetch a user's stats incrementally, render the charts and swap them in."""
+        # Re-list repositories so new pushes are seen; unchanged ones stay cached.
+        # Listings and notes are dropped again afterwards, so the shared client
+        # only holds users that are being refreshed
+        self.client.forget(username)
+        os.makedirs(self.output_dir, exist_ok=True)
+        build = tempfile.mkdtemp(prefix=f'.{username}.', dir=self.output_dir)
+        try:
+            # Render into a hidden sibling, so readers never see half-written files
+            stats = fetch_user_stats(username, self.client, self.backend)
+            futures = [self.render_pool.submit(*job)
+                       for job in chart_jobs(stats['language_stats'], stats['repo_timeline'],
+                                             build, self.profile, stats['commit_index'],
+                                             self.fast_wordcloud)]
+            for future in futures:
+                self.render_pool.result(future)
+            write_user_stats(stats, build)
+            self._publish(build, os.path.join(self.output_dir, username))
+        finally:
+            self.client.forget(username)
+            shutil.rmtree(build, ignore_errors=True)
+        self._remember(username, self._load(username))
+
+    def _publish(self, build, directory):
+        # Move each finished file into place, drop charts the new build did
+        # not produce, and swap stats.json in last: its mtime marks the build
+        os.makedirs(directory, exist_ok=True)
+        built = set(os.listdir(build))
+        for name in sorted(built - {'stats.json'}):
+            os.replace(os.path.join(build, name), os.path.join(directory, name))
+        for name in set(os.listdir(directory)) - built:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+        os.replace(os.path.join(build, 'stats.json'), os.path.join(directory, 'stats.json'))
+
+    def _refresh_worker(self):
+        while True:
+            username = self.queue.get()
+            if username is None:
+                break
+            try:
+                self.refresh(username)
+            except Exception as e:
+                print(f"Error refreshing {username}: {e}")
+            finally:
+                with self.lock:
+                    self.queued.discard(username)
+
+    def _schedule_stale(self):
+        while not self.stopping.wait(SCHEDULE_INTERVAL):
+            with self.lock:
+                stale = [username for username, entry in self.memory.items()
+                         if self.is_stale(entry)]
+            for username in stale:
+                self.request_refresh(username)
+            self.evict_disk()
+
+    def evict_disk(self):
+        """Delete the least recently built users beyond disk_users, with their stored data."""
+        try:
+            entries = [entry for entry in os.scandir(self.output_dir)
+                       if entry.is_dir() and not entry.name.startswith('.')]  # Not builds
+        except FileNotFoundError:
+            return
+        with self.lock:
+            busy = set(self.memory) | self.queued
+
+        built = []
+        for entry in entries:
+            if entry.name in busy:
+                continue
+            try:
+                built.append((os.path.getmtime(os.path.join(entry.path, 'stats.json')), entry.name))
+            except OSError:
+                built.append((0, entry.name))  # A first build that failed
+        for _, username in sorted(built)[:max(len(entries) - self.disk_users, 0)]:
+            shutil.rmtree(os.path.join(self.output_dir, username), ignore_errors=True)
+            self.backend.forget_user(username, self.client)
+
+    def start(self):
+        # Builds left over by a server that did not stop cleanly
+        if os.path.isdir(self.output_dir):
+            for entry in os.scandir(self.output_dir):
+                if entry.is_dir() and entry.name.startswith('.'):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+        # Rendering runs in worker processes so request threads never wait on it
+        self.render_pool = RenderPool(self.render_workers)
+        self.threads = [threading.Thread(target=self._refresh_worker, daemon=True)
+                        for _ in range(self.refresh_workers)]
+        self.threads.append(threading.Thread(target=self._schedule_stale, daemon=True))
+        self.threads.append(threading.Thread(target=self.httpd.serve_forever, daemon=True))
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for _ in range(self.refresh_workers):
+            self.queue.put(None)
+        for thread in self.threads[:self.refresh_workers]:
+            thread.join()
+        self.render_pool.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve resume charts for any GitHub user.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('-p', '--port', type=int, default=8000)
+    parser.add_argument('-o', '--output', help="directory holding the built files")
+    parser.add_argument('--refresh', type=int, default=REFRESH_INTERVAL,
+                        help="seconds before a user's charts are rebuilt")
+    parser.add_argument('-w', '--workers', type=int, default=REFRESH_WORKERS,
+                        help="users rebuilt concurrently")
+    parser.add_argument('-r', '--render-workers', type=int, default=RENDER_WORKERS,
+                        help="processes rendering charts")
+    parser.add_argument('--graphql', action='store_true',
+                        help="fetch through the GraphQL API (needs a token)")
+    parser.add_argument('--profile', choices=PROFILES, default=SERVER_PROFILE,
+                        help="render profile, which also picks the chart format")
+    parser.add_argument('--fast-wordcloud', action='store_true', default=None,
+                        help="place only the top repositories in the word cloud")
+    args = parser.parse_args(argv)
+
+    server = ResumeServer(args.host, args.port, args.output,
+                          backend=graphql if args.graphql else github_stats,
+                          refresh_interval=args.refresh, refresh_workers=args.workers,
+                          render_workers=args.render_workers, profile=args.profile,
+                          fast_wordcloud=args.fast_wordcloud)
+    with server:
+        print(f"Serving on {server.url}/<username>/{{{','.join(server.files)}}}")
+        try:
+            server.stopping.wait()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .cache import CACHE_DIR
+
+SCHEMA_VERSION = 1  # 1: daily commit counts replaced the monthly table
+
+class CommitStore:
+    """Local record of daily commit counts, download totals and sync state per repository."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, 'commits.sqlite')
+        self.lock = threading.Lock()
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS repos (
+                username TEXT,
+                repo TEXT,
+                pushed_at TEXT,
+                since TEXT,
+                PRIMARY KEY (username, repo));
+            CREATE TABLE IF NOT EXISTS daily (
+                username TEXT,
+                repo TEXT,
+                day TEXT,
+                commits INTEGER,
+                PRIMARY KEY (username, repo, day));
+            CREATE TABLE IF NOT EXISTS downloads (
+                username TEXT,
+                repo TEXT,
+                pushed_at TEXT,
+                downloads INTEGER,
+                fetched_at REAL,
+                PRIMARY KEY (username, repo));
+        ''')
+        if self.db.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+            # Monthly counts cannot be split into days, so resync from scratch
+            self.db.executescript(f'''
+                DROP TABLE IF EXISTS monthly;
+                DELETE FROM repos;
+                PRAGMA user_version = {SCHEMA_VERSION};
+            ''')
+        self.db.commit()
+
+    def get_sync_state(self, username):
+        """Map repo name -> (pushed_at, since) for every synced repository."""
+        with self.lock:
+            rows = self.db.execute('SELECT repo, pushed_at, since FROM repos WHERE username = ?',
+                                   (username,)).fetchall()
+        return {repo: (pushed_at, since) for repo, pushed_at, since in rows}
+
+    def merge(self, username, repo, pushed_at, since, day_counts, replace=False):
+        """Add new daily commit counts and record how far the repo is synced.
+
+        With replace=True the counts replace everything stored for the repo.
+        """
+        with self.lock, self.db:
+            if replace:
+                self.db.execute('DELETE FROM daily WHERE username = ? AND repo = ?',
+                                (username, repo))
+            self.db.executemany(
+                '''INSERT INTO daily VALUES (?, ?, ?, ?)
+                   ON CONFLICT (username, repo, day)
+                   DO UPDATE SET commits = commits + excluded.commits''',
+                [(username, repo, day, count) for day, count in day_counts.items()])
+            self.db.execute('INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?)',
+                            (username, repo, pushed_at, since))
+
+    def get_downloads(self, username):
+        """Map repo name -> (pushed_at, downloads, fetched_at) for every counted repository."""
+        with self.lock:
+            rows = self.db.execute('SELECT repo, pushed_at, downloads, fetched_at FROM downloads '
+                                   'WHERE username = ?', (username,)).fetchall()
+        return {repo: (pushed_at, downloads, fetched_at)
+                for repo, pushed_at, downloads, fetched_at in rows}
+
+    def set_downloads(self, username, repo, pushed_at, downloads):
+        """Record a repository's release download total as of its pushed_at."""
+        with self.lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?)',
+                            (username, repo, pushed_at, downloads, time.time()))
+
+    def prune(self, username, repo_names):
+        """Forget repositories that no longer appear in the listing."""
+        stale = (set(self.get_sync_state(username)) | set(self.get_downloads(username))) \
+            - set(repo_names)
+        with self.lock, self.db:
+            for repo in stale:
+                self.db.execute('DELETE FROM repos WHERE username = ? AND repo = ?',
+                                (username, repo))
+                self.db.execute('DELETE FROM daily WHERE username = ? AND repo = ?',
+                                (username, repo))
+                self.db.execute('DELETE FROM downloads WHERE username = ? AND repo = ?',
+                                (username, repo))
+
+    def daily_counts(self, username):
+        """Return (day, repo, commits) rows for a user, ordered by repo and day."""
+        with self.lock:
+            return self.db.execute(
+                'SELECT day, repo, commits FROM daily WHERE username = ? ORDER BY repo, day',
+                (username,)).fetchall()
+
+    def repo_totals(self, username):
+        """Map repo name -> total stored commits for every synced repository."""
+        with self.lock:
+            rows = self.db.execute(
+                '''SELECT repos.repo, COALESCE(SUM(daily.commits), 0)
+                   FROM repos LEFT JOIN daily
+                   ON daily.username = repos.username AND daily.repo = repos.repo
+                   WHERE repos.username = ? GROUP BY repos.repo''',
+                (username,)).fetchall()
+        return dict(rows)
+
+    def forget(self, username):
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM repos WHERE username = ?', (username,))
+            self.db.execute('DELETE FROM daily WHERE username = ?', (username,))
+            self.db.execute('DELETE FROM downloads WHERE username = ?', (username,))
+
+    def close(self):
+        self.db.close()
+
+_default_store = None
+_default_lock = threading.Lock()
+
+def get_store():
+    """Return the process-wide default commit store, opening it on first use."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = CommitStore()
+        return _default_store
@@ -0,0 +1,45 @@
+from .model import Timeline
+
+BAR_WIDTH = 40
+BLOCKS = ' ▏▎▍▌▋▊▉'  # partial blocks in eighths of a cell
+
+def bar(value, maximum, width=BAR_WIDTH):
+    """Draw value/maximum as a Unicode bar at most width cells long."""
+    if maximum <= 0:
+        return ''
+    full, rest = divmod(round(value / maximum * width * 8), 8)
+    return '█' * full + (BLOCKS[rest] if rest else '')
+
+def format_language_bars(language_stats, width=BAR_WIDTH):
+    """Render the language breakdown as one bar per language."""
+    if not language_stats:
+        return "No language data"
+    name_width = max(len(lang) for lang in language_stats)
+    top = max(language_stats.values())
+    return '\n'.join(f"{lang:<{name_width}} {bar(pct, top, width):<{width}} {pct:5.1f}%"
+                     for lang, pct in language_stats.items())
+
+def format_timeline_bars(timeline_data, width=BAR_WIDTH):
+    """Render monthly commit totals as one bar per period, busiest repo alongside."""
+    if isinstance(timeline_data, Timeline):
+        timeline_data = timeline_data.to_dict()
+    if not isinstance(timeline_data, dict):
+        timeline_data = {}
+    data = timeline_data.get('timeline', [])
+    lines = [f"Total Stars: {timeline_data.get('total_stars', 0)} | "
+             f"Total Downloads: {timeline_data.get('total_downloads', 0):,}"]
+    if not data:
+        return '\n'.join(lines + ["No commit activity"])
+
+    top = max(period['total_commits'] for period in data)
+    for period in data:
+        busiest = max(period['repos'], key=lambda repo: repo['commits'])['name']
+        lines.append(f"{period['period']} {bar(period['total_commits'], top, width):<{width}} "
+                     f"{period['total_commits']:>5}  {busiest}")
+    return '\n'.join(lines)
+
+def print_language_bars(language_stats):
+    print(format_language_bars(language_stats))
+
+def print_timeline_bars(timeline_data):
+    print(format_timeline_bars(timeline_data))
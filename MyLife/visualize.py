@@ -1,10 +1,15 @@
-from collections import defaultdict
+import heapq
+import io
 from datetime import datetime
 
 import matplotlib.pyplot as plt
 import numpy as np
 from wordcloud import WordCloud
 
+from .cache import cached_render, get_render_cache
+from .model import Timeline
+from .profiles import DEFAULT_PROFILE, get_profile, output_format
+
 # Define language colors based on their brand colors
 LANGUAGE_COLORS = {
     'Python': '#3776AB',
@@ -29,6 +34,20 @@ LANGUAGE_COLORS = {
     'Dart': '#00B4AB'
 }
 
+WORDCLOUD_OPTIONS = {
+    'width': 800,
+    'height': 400,
+    'background_color': 'white',
+    'min_font_size': 10,
+    'max_font_size': 100,
+    'prefer_horizontal': 1,
+    'colormap': 'viridis'
+}
+FAST_MAX_WORDS = 100  # repositories shown by the fast word cloud
+
+# GitHub's contribution calendar palette, from no commits to the busiest days
+HEATMAP_COLORS = ['#ebedf0', '#9be9a8', '#40c463', '#30a14e', '#216e39']
+
 def get_color(language):
     """Get color for a language, with fallback to a hash-based color."""
     if language in LANGUAGE_COLORS:
@@ -40,7 +59,17 @@ def get_color(language):
     b = hash_val & 0x0000FF
     return f'#{r:02x}{g:02x}{b:02x}'
 
-def create_language_pie(language_stats):
+def save_figure(path, profile=DEFAULT_PROFILE, **options):
+    """Save and close the current figure; return path, or the image bytes if path is None."""
+    target = io.BytesIO() if path is None else path
+    plt.savefig(target, format=output_format(path, profile), dpi=get_profile(profile)['dpi'],
+                **options)
+    plt.close()
+    return target.getvalue() if path is None else path
+
+@cached_render
+def create_language_pie(language_stats, path='language_distribution.png',
+                        profile=DEFAULT_PROFILE):
     """Create a pie chart of language statistics with optimized labels."""
     if not language_stats:
         return
@@ -96,36 +125,31 @@ def create_language_pie(language_stats):
     
     plt.axis('equal')
     
-    plt.savefig('language_distribution.png', 
-                dpi=300, 
-                bbox_inches='tight',
-                facecolor='white',
-                edgecolor='none',
-                pad_inches=0.2)
-    plt.close()
+    return save_figure(path, profile,
+                       bbox_inches='tight',
+                       facecolor='white',
+                       edgecolor='none',
+                       pad_inches=0.2)
 
-def create_repo_timeline(timeline_data):
+@cached_render
+def create_repo_timeline(timeline_data, path='repo_timeline.png', profile=DEFAULT_PROFILE):
     """Create a timeline visualization of repositories with stacked bars."""
-    if not timeline_data or not isinstance(timeline_data, dict):
+    timeline = Timeline.coerce(timeline_data)
+    if timeline is None:
         return
     
     # Create figure
     plt.figure(figsize=(15, 8))
     
     # Extract data
-    data = timeline_data.get('timeline', [])
-    total_stars = timeline_data.get('total_stars', 0)
-    total_downloads = timeline_data.get('total_downloads', 0)
+    total_stars = timeline.total_stars
+    total_downloads = timeline.total_downloads
     
     # Prepare data
-    periods = [group['period'] for group in data]
+    periods = timeline.periods
     
     # Generate unique colors and patterns for repositories
-    all_repos = sorted(set(
-        repo['name']
-        for period_data in data
-        for repo in period_data['repos']
-    ))
+    all_repos = sorted(set(timeline.repo_names))
     
     # Create color and pattern mapping for repos
     from matplotlib.colors import hsv_to_rgb
@@ -142,34 +166,68 @@ def create_repo_timeline(timeline_data):
             pattern = ''
         repo_styles[repo_name] = {'color': color, 'hatch': pattern}
     
-    # Track languages and calculate positions
-    all_languages = set()
-    bottom = np.zeros(len(periods))
-    
-    # Create stacked bars for each period
-    for idx, period_data in enumerate(data):
-        sorted_repos = sorted(period_data['repos'], key=lambda x: x['commits'], reverse=True)
-        
-        for repo in sorted_repos:
-            lang = repo['language']
-            commits = repo['commits']
-            color = get_color(lang)
-            style = repo_styles[repo['name']]
-            
-            # Create bar segment with color, edge and optional hatch
-            bar = plt.bar(idx, commits, bottom=bottom[idx],
-                         color=color, width=0.8,
-                         edgecolor=style['color'],
-                         linewidth=2,
-                         hatch=style['hatch'] * 2,
-                         alpha=0.9 if style['hatch'] else 1)
+    # Scatter the timeline rows into a repo x period matrix
+    repo_index = {repo_name: i for i, repo_name in enumerate(all_repos)}
+    rows = np.array([repo_index[name] for name in timeline.repo_names],
+                    dtype=int)[np.asarray(timeline.repo_ids, dtype=int)]
+    cols = np.asarray(timeline.period_ids, dtype=int)
+    shape = (len(all_repos), len(periods))
+    commits = np.zeros(shape)
+    commits[rows, cols] = timeline.commits
+    position = np.zeros(shape)  # listing order, to break ties like a stable sort
+    position[rows, cols] = np.arange(len(timeline.commits))
+    
+    repo_languages = {name: timeline.repo_language(i)
+                      for i, name in enumerate(timeline.repo_names)}
+    all_languages = set(repo_languages.values())
+    
+    # Stack each period by descending commits: the bottom of a segment is
+    # the cumulative sum of the segments ranked below it
+    order = np.lexsort((position, -commits), axis=0)
+    stacked = np.take_along_axis(commits, order, axis=0)
+    bottom = np.empty(shape)
+    np.put_along_axis(bottom, order, np.cumsum(stacked, axis=0) - stacked, axis=0)
+    totals = commits.sum(axis=0)
+    
+    # Draw the stacks bottom-up, one level at a time, so the edge shared by two
+    # stacked segments belongs to the upper one. Each level is one collection
+    # per hatch pattern, so the artist count grows with repositories rather
+    # than repositories x months
+    from matplotlib.collections import PolyCollection
+    ax = plt.gca()
+    x = np.arange(len(periods))
+    hatches = np.array([repo_styles[repo_name]['hatch'] for repo_name in repo_index])
+    edge_colors = np.array([repo_styles[repo_name]['color'] for repo_name in repo_index])
+    face_colors = np.array([get_color(repo_languages[repo_name]) for repo_name in repo_index])
+    for level in range(len(all_repos)):
+        level_repos = order[level]
+        present = stacked[level] > 0
+        if not present.any():
+            break  # Stacks are sorted, so every higher level is empty too
+        for hatch in dict.fromkeys(hatches[level_repos[present]]):
+            cols = np.flatnonzero(present & (hatches[level_repos] == hatch))
+            rows = level_repos[cols]
+            left, right = x[cols] - 0.4, x[cols] + 0.4
+            low, high = bottom[rows, cols], bottom[rows, cols] + commits[rows, cols]
+            corners = np.stack([np.stack([left, low], axis=1), np.stack([left, high], axis=1),
+                                np.stack([right, high], axis=1), np.stack([right, low], axis=1)],
+                               axis=1)
             
-            bottom[idx] += commits
-            all_languages.add(lang)
-        
-        # Add total commits label on top
-        total_commits = sum(repo['commits'] for repo in sorted_repos)
-        plt.text(idx, bottom[idx] + 1, str(total_commits),
+            # Bar segments colored by language, with repo edge and optional hatch
+            segments = PolyCollection(corners,
+                                      facecolors=face_colors[rows],
+                                      edgecolors=edge_colors[rows],
+                                      linewidths=2,
+                                      joinstyle='miter',
+                                      hatch=hatch * 2 or None,
+                                      alpha=0.9 if hatch else 1)
+            segments.sticky_edges.y.append(0)  # Bars start at zero, like plt.bar
+            ax.add_collection(segments)
+    ax.autoscale_view()
+    
+    # Add total commits label on top
+    for idx, total_commits in enumerate(totals):
+        plt.text(idx, total_commits + 1, str(int(total_commits)),
                 ha='center', va='bottom',
                 fontsize=10, weight='bold')
     
@@ -213,40 +271,77 @@ def create_repo_timeline(timeline_data):
     
     # Adjust layout
     plt.subplots_adjust(right=0.75)  #  Adjust layout to fit legends 
-    plt.savefig('repo_timeline.png', 
-                dpi=300,
-                bbox_inches='tight',
-                facecolor='white')
-    plt.close()
+    return save_figure(path, profile,
+                       bbox_inches='tight',
+                       facecolor='white')
+
+def write_wordcloud(repo_weights, path, max_words=FAST_MAX_WORDS, profile=DEFAULT_PROFILE):
+    """Write the top repositories as a word cloud, reusing cached layouts.
 
-def create_repo_wordcloud(timeline_data):
-    """Create a word cloud visualization of repositories weighted by commit counts."""
-    if not timeline_data or not isinstance(timeline_data, dict):
+    Returns path, or the image bytes if path is None.
+    """
+    ranking = [(name, weight) for name, weight
+               in heapq.nlargest(max_words, repo_weights.items(), key=lambda item: item[1])
+               if weight > 0]
+    if not ranking:
         return
+    wordcloud = WordCloud(max_words=max_words, scale=get_profile(profile)['scale'],
+                          **WORDCLOUD_OPTIONS)
     
-    # Extract timeline data from dictionary
-    data = timeline_data.get('timeline', [])
-    if not data:
+    # Placing words is the slow part, and it only depends on their order,
+    # so an unchanged ranking reuses the previous layout
+    cache = get_render_cache()
+    key = None
+    if cache is not None:
+        key = cache.make_key('wordcloud_layout', [name for name, _ in ranking],
+                             dict(WORDCLOUD_OPTIONS, max_words=max_words))
+        layout = cache.load_json(key)
+        if layout is not None:
+            wordcloud.layout_ = [(tuple(word), font_size, tuple(position), orientation, color)
+                                 for word, font_size, position, orientation, color in layout]
+    if not hasattr(wordcloud, 'layout_'):
+        wordcloud.generate_from_frequencies(dict(ranking))
+        if key is not None:
+            cache.store_json(key, [
+                (word, int(font_size), [int(x) for x in position],
+                 None if orientation is None else int(orientation), color)
+                for word, font_size, position, orientation, color in wordcloud.layout_])
+    
+    fmt = output_format(path, profile)
+    if fmt == 'svg':
+        image = wordcloud.to_svg().encode()
+    else:
+        # Like WordCloud.to_file, minus its slow optimize=True PNG pass
+        buffer = io.BytesIO()
+        wordcloud.to_image().save(buffer, format=fmt)
+        image = buffer.getvalue()
+    if path is None:
+        return image
+    with open(path, 'wb') as f:
+        f.write(image)
+    return path
+
+@cached_render
+def create_repo_wordcloud(timeline_data, path='repo_wordcloud.png', profile=DEFAULT_PROFILE,
+                          fast=False, max_words=FAST_MAX_WORDS):
+    """Create a word cloud visualization of repositories weighted by commit counts.
+
+    With fast=True only the max_words most committed repositories are placed,
+    and the WordCloud bitmap is written directly instead of through a figure.
+    """
+    timeline = Timeline.coerce(timeline_data)
+    if not timeline:
         return
     
     # Calculate total commits per repository
-    repo_weights = defaultdict(int)
-    for period in data:
-        for repo in period['repos']:
-            repo_weights[repo['name']] += repo['commits']
+    repo_weights = timeline.repo_totals()
+    if fast:
+        return write_wordcloud(repo_weights, path, max_words, profile)
     
     # Create word cloud
     plt.figure(figsize=(12, 8))
     
-    wordcloud = WordCloud(
-        width=800,
-        height=400,
-        background_color='white',
-        min_font_size=10,
-        max_font_size=100,
-        prefer_horizontal=1,
-        colormap='viridis',
-    ).generate_from_frequencies(repo_weights)
+    wordcloud = WordCloud(**WORDCLOUD_OPTIONS).generate_from_frequencies(repo_weights)
     
     plt.imshow(wordcloud, interpolation='bilinear')
     plt.axis('off')
@@ -255,8 +350,70 @@ def create_repo_wordcloud(timeline_data):
               size=14, 
               weight='bold')
     
-    plt.savefig('repo_wordcloud.png',
-                dpi=300,
-                bbox_inches='tight',
-                facecolor='white')
-    plt.close()
+    return save_figure(path, profile,
+                       bbox_inches='tight',
+                       facecolor='white')
+
+@cached_render
+def create_contribution_heatmap(commit_index, path='contribution_heatmap.png',
+                                profile=DEFAULT_PROFILE, year=None):
+    """Create a GitHub-style calendar of daily commits.
+
+    Shows the 52 weeks up to the latest commit, or one calendar year.
+    """
+    if not commit_index:
+        return
+    from matplotlib.colors import ListedColormap
+    
+    if year is None:
+        end = commit_index.span()[1]
+        start = end - np.timedelta64(52 * 7 - 1, 'D')
+    else:
+        start, end = np.datetime64(f'{year}-01-01'), np.datetime64(f'{year}-12-31')
+    start, counts = commit_index.daily_totals(start, end)
+    
+    # Shade active days by quartile: level 0 is no commits, 1-4 get busier
+    active = counts[counts > 0]
+    bounds = np.quantile(active, [0.25, 0.5, 0.75]) if active.size else np.ones(3)
+    levels = np.where(counts > 0, 1 + np.searchsorted(bounds, counts), 0)
+    
+    # One column per week from Sunday to Saturday; cells outside the range stay blank
+    first_weekday = int((start.astype(int) + 4) % 7)  # 1970-01-01 was a Thursday
+    weeks = -(-(first_weekday + len(counts)) // 7)
+    cells = np.full(weeks * 7, -1)
+    cells[first_weekday:first_weekday + len(counts)] = levels
+    grid = np.ma.masked_less(cells.reshape(weeks, 7).T, 0)
+    
+    plt.figure(figsize=(max(weeks, 10) * 0.22 + 1.5, 2.6))
+    ax = plt.gca()
+    ax.pcolormesh(grid, cmap=ListedColormap(HEATMAP_COLORS), vmin=0, vmax=len(HEATMAP_COLORS) - 1,
+                  edgecolors='white', linewidth=2)
+    ax.set_aspect('equal')
+    ax.invert_yaxis()
+    
+    # Label the first week of each month, and every other weekday
+    week_starts = start - np.timedelta64(first_weekday, 'D') + 7 * np.arange(weeks)
+    months = np.maximum(week_starts, start).astype('datetime64[M]')
+    new_month = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    # Like GitHub, drop a month whose label the next one would run into
+    new_month = new_month[np.r_[np.diff(new_month) > 2, True]]
+    ax.set_xticks(new_month + 0.5)
+    ax.set_xticklabels([months[i].astype(datetime).strftime('%b') for i in new_month])
+    ax.xaxis.tick_top()
+    ax.set_yticks([1.5, 3.5, 5.5])
+    ax.set_yticklabels(['Mon', 'Wed', 'Fri'])
+    ax.tick_params(length=0, labelsize=8)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    
+    period = year if year is not None else 'the last year'
+    plt.title(f"{int(counts.sum()):,} contributions in {period}",
+              loc='left', pad=18, size=11, weight='bold')
+    plt.legend(handles=[plt.Rectangle((0, 0), 1, 1, color=color) for color in HEATMAP_COLORS],
+               labels=['Less', '', '', '', 'More'], ncol=len(HEATMAP_COLORS),
+               loc='upper right', bbox_to_anchor=(1, 0), frameon=False, fontsize=8,
+               handlelength=1, handletextpad=0.3, columnspacing=0.3)
+    
+    return save_figure(path, profile,
+                       bbox_inches='tight',
+                       facecolor='white')
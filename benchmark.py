@@ -0,0 +1,122 @@
+# Offline benchmarks for the resume pipeline, run against MyLife.fakehub:
+#   python benchmark.py --sizes 10 100 1000 --latency 0.02 --json results.json
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from MyLife.cache import set_render_cache
+from MyLife.client import GitHubClient
+from MyLife.fakehub import FakeGitHub, add_commit, make_account
+from MyLife import graphql
+from MyLife.github_stats import get_commit_index, get_language_stats, get_timeline
+from MyLife.store import CommitStore
+
+USERNAME = 'octocat'
+
+def measure(name, func, hub=None):
+    """Run func once, recording wall time, peak traced memory and requests served."""
+    if hub is not None:
+        hub.reset_stats()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {
+        'step': name,
+        'requests': hub.request_count if hub is not None else 0,
+        'wall_s': round(wall, 3),
+        'peak_mb': round(peak / 1e6, 2)
+    }
+
+def bench_size(repos, commits_per_repo, latency, render, output_dir):
+    """Benchmark fetching and rendering for one synthetic account size."""
+    from MyLife.visualize import (create_contribution_heatmap, create_language_pie,
+                                  create_repo_timeline, create_repo_wordcloud)
+
+    rows = []
+    account = make_account(USERNAME, repos=repos, commits_per_repo=commits_per_repo)
+    with FakeGitHub(account, latency=latency) as hub:
+        # Each fetch gets a cold client and store, so neither benefits from the other
+        language_stats, row = measure('get_language_stats', lambda: get_language_stats(
+            USERNAME, GitHubClient(api_url=hub.url), CommitStore(':memory:')), hub)
+        rows.append(row)
+        client, store = GitHubClient(api_url=hub.url), CommitStore(':memory:')
+        timeline, row = measure('get_repo_timeline',
+                                lambda: get_timeline(USERNAME, client, store), hub)
+        rows.append(row)
+        commit_index = get_commit_index(USERNAME, client, store)  # From the synced store
+
+        # The GraphQL backend answers the same questions in a few bulk queries
+        _, row = measure('graphql_language_stats', lambda: graphql.get_language_stats(
+            USERNAME, GitHubClient(token='benchmark', api_url=hub.url)), hub)
+        rows.append(row)
+        _, row = measure('graphql_timeline', lambda: graphql.get_timeline(
+            USERNAME, GitHubClient(token='benchmark', api_url=hub.url)), hub)
+        rows.append(row)
+
+        # A warm re-sync with one new commit, as in a nightly refresh
+        client, store = GitHubClient(api_url=hub.url), CommitStore(':memory:')
+        get_timeline(USERNAME, client, store)
+        client.inventory.clear()
+        add_commit(account, account['repos'][0]['name'], '2030-01-01T00:00:00Z')
+        _, row = measure('incremental_refresh',
+                         lambda: get_timeline(USERNAME, client, store), hub)
+        rows.append(row)
+
+    if render:
+        set_render_cache(None)  # Measure real rendering, not cache hits
+        for name, renderer, data, params in (
+                ('create_language_pie', create_language_pie, language_stats, {}),
+                ('create_repo_timeline', create_repo_timeline, timeline, {}),
+                ('create_repo_wordcloud', create_repo_wordcloud, timeline, {}),
+                ('create_repo_wordcloud_fast', create_repo_wordcloud, timeline, {'fast': True}),
+                ('create_contribution_heatmap', create_contribution_heatmap, commit_index, {})):
+            path = os.path.join(output_dir, f'{name}_{repos}.png')
+            _, row = measure(name, lambda: renderer(data, path, **params))
+            rows.append(row)
+
+    for row in rows:
+        row['repos'] = repos
+    return rows
+
+def format_table(rows):
+    columns = ['repos', 'step', 'requests', 'wall_s', 'peak_mb']
+    widths = [max(len(col), *(len(str(row[col])) for row in rows)) for col in columns]
+    lines = ['  '.join(col.ljust(width) for col, width in zip(columns, widths))]
+    lines += ['  '.join(str(row[col]).ljust(width) for col, width in zip(columns, widths))
+              for row in rows]
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MyLife against a fake GitHub API.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help="repository counts to benchmark")
+    parser.add_argument('--commits', type=int, default=50,
+                        help="average commits per repository")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="injected seconds of latency per request")
+    parser.add_argument('--no-render', dest='render', action='store_false',
+                        help="skip the chart renderers")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    rows = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for size in args.sizes:
+            rows += bench_size(size, args.commits, args.latency, args.render, output_dir)
+
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == '__main__':
+    main()
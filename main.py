@@ -1,12 +1,15 @@
 # See the full Repo: https://github.com/HNRobert/Python-Style-Resume
+import json
+import sys
+
 import MyLife
 
 class HNRobert:
     def __init__(self):
-        self.language_stats = MyLife.get_language_stats("HNRobert")
-        self.repo_timeline = MyLife.get_repo_timeline("HNRobert")
+        self.repo_timeline = MyLife.get_repo_timeline("HNRobert")  # Syncs the commits
+        self.language_stats = MyLife.get_language_stats("HNRobert")  # Reuses them
+        self.commit_index = MyLife.get_commit_index("HNRobert")
         self.GITHUB_PROFILE = "https://github.com/HNRobert"
-        MyLife.create_language_pie(self.language_stats)
     
     def print_identity(self):
         print(
@@ -46,15 +49,20 @@ class HNRobert:
                              Full-stack Architecture Experience
         """
     
-    def list_coding_experiences(self):
+    def list_coding_experiences(self, text=False, fast_wordcloud=False):
         print("\n👨‍💻 GitHub Repository Timeline:")
-        MyLife.create_repo_timeline(self.repo_timeline)
-        MyLife.create_repo_wordcloud(self.repo_timeline)
+        if text:  # Terminal only, matplotlib is never imported
+            MyLife.print_language_bars(self.language_stats)
+            MyLife.print_timeline_bars(self.repo_timeline)
+            return
+        MyLife.render_charts(MyLife.chart_jobs(self.language_stats, self.repo_timeline,
+                                               commit_index=self.commit_index,
+                                               fast_wordcloud=fast_wordcloud))
 
-    def display_resume(self):
+    def display_resume(self, text=False, fast_wordcloud=False):
         self.print_identity(); self.verify_education()
         self.verify_competitions(); self.list_skills()
-        self.list_coding_experiences()
+        self.list_coding_experiences(text, fast_wordcloud)
         self.more()
     
     def more(self):
@@ -68,4 +76,13 @@ class HNRobert:
 
 if __name__ == "__main__":
     resume = HNRobert()
-    resume.display_resume()
+    resume.display_resume(text='--text' in sys.argv,
+                          fast_wordcloud='--fast-wordcloud' in sys.argv)
+    for note in MyLife.get_incomplete():
+        print("⚠️ Incomplete data:", note)
+
+    print("\n⏱️ Performance report:")
+    if '--json-report' in sys.argv:
+        print(json.dumps(MyLife.RECORDER.summary(), indent=2))
+    else:
+        print(MyLife.RECORDER.format_report())
@@ -0,0 +1,246 @@
+# Offline regression checks for the resume pipeline, run against MyLife.fakehub:
+#   python regression.py            # every check
+#   python regression.py sync index # checks whose name contains a word
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from MyLife import graphql
+from MyLife.cache import RenderCache, ResponseCache
+from MyLife.client import GitHubClient
+from MyLife.fakehub import FakeGitHub, add_commit, make_account
+from MyLife.github_stats import (get_commit_index, get_incomplete, get_language_stats,
+                                 get_timeline)
+from MyLife.model import CommitIndex
+from MyLife.ratelimit import RateLimitScheduler
+from MyLife.render import RenderPool
+from MyLife.server import ResumeServer
+from MyLife.store import CommitStore
+
+USERNAME = 'octocat'
+
+# Prints the render cache key of a fixed timeline, to run under different hash seeds
+TIMELINE_KEY = '''
+from collections import Counter
+from MyLife.cache import RenderCache
+from MyLife.fakehub import make_account
+from MyLife.model import Timeline
+account = make_account('octocat', repos=20, commits_per_repo=10)
+months = Counter((commit['commit']['author']['date'][:7], name)
+                 for name, commits in account['commits'].items() for commit in commits)
+timeline = Timeline.from_rows([(month, name, count) for (month, name), count in months.items()],
+                              account['repos'])
+print(RenderCache.make_key('create_repo_timeline', timeline, {'profile': 'print'}))
+'''
+
+def check_cache_revalidation():
+    """Fresh entries skip the network, stale ones revalidate, changes come through."""
+    account = make_account(USERNAME, repos=3, commits_per_repo=5)
+    path = f'/users/{USERNAME}/repos'
+    with FakeGitHub(account) as hub, tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(os.path.join(directory, 'http.sqlite'), ttl=60)
+        with GitHubClient(api_url=hub.url, cache=cache) as client:
+            first = client.get(path)
+            second = client.get(path)
+            assert hub.request_count == 1, "a fresh cache entry went to the network"
+            assert second.from_cache and second.json() == first.json()
+
+            cache.ttl = 0
+            third = client.get(path)
+            assert hub.request_count == 2, "a stale entry was not revalidated"
+            assert third.from_cache, "an unchanged listing was downloaded again"
+
+            add_commit(account, 'project-0000')
+            fourth = client.get(path)
+            assert not getattr(fourth, 'from_cache', False), "a changed listing came from the cache"
+            assert fourth.json() != first.json()
+
+def check_scheduler_waits():
+    """An exhausted budget waits for the reset instead of hitting 403s."""
+    account = make_account(USERNAME, repos=1)
+    scheduler = RateLimitScheduler(reserve={})
+    with FakeGitHub(account, rate_limit=3, rate_window=1) as hub:
+        client = GitHubClient(api_url=hub.url, scheduler=scheduler)
+        statuses = [client.get(f'/users/{USERNAME}').status_code for _ in range(6)]
+    assert statuses == [200] * 6, f"statuses {statuses}"
+    assert hub.request_count == 6, "requests were retried after a rate limit"
+    assert scheduler.waited > 0, "the scheduler never waited for the reset"
+
+def check_incremental_sync():
+    """An incremental sync ends with the same counts as a fresh one."""
+    account = make_account(USERNAME, repos=5, commits_per_repo=5)
+    with FakeGitHub(account) as hub:
+        store = CommitStore(':memory:')
+        get_commit_index(USERNAME, GitHubClient(api_url=hub.url), store)
+
+        add_commit(account, 'project-0000')  # An ordinary push
+        add_commit(account, 'project-0001', '2021-01-01T00:00:00Z')  # A merged older branch
+        newest = account['commits']['project-0002'][0]['commit']['committer']['date']
+        add_commit(account, 'project-0002', newest)  # Same second as the sync cursor
+        account['commits']['project-0003'].pop()  # Rewritten history
+        add_commit(account, 'project-0003')
+
+        hub.reset_stats()
+        incremental = get_commit_index(USERNAME, GitHubClient(api_url=hub.url), store)
+        assert hub.requests['repos/commits'] < 20, "the incremental sync refetched too much"
+        fresh = get_commit_index(USERNAME, GitHubClient(api_url=hub.url), CommitStore(':memory:'))
+    assert incremental.to_dict() == fresh.to_dict(), \
+        f"incremental {incremental.repo_totals()} != fresh {fresh.repo_totals()}"
+
+def check_refresh_requests():
+    """A refresh after one push only refetches what the push changed."""
+    account = make_account(USERNAME, repos=20, commits_per_repo=10)
+    with FakeGitHub(account) as hub:
+        client, store = GitHubClient(api_url=hub.url), CommitStore(':memory:')
+        get_timeline(USERNAME, client, store)
+
+        client.forget(USERNAME)
+        add_commit(account, 'project-0000')
+        account['releases']['project-0000'].append(
+            {'tag_name': 'v9', 'assets': [{'download_count': 1000}]})
+        hub.reset_stats()
+        refreshed = get_timeline(USERNAME, client, store)
+        assert hub.requests['repos/releases'] == 1, f"requests {dict(hub.requests)}"
+        assert hub.request_count <= 5, f"requests {dict(hub.requests)}"
+        fresh = get_timeline(USERNAME, GitHubClient(api_url=hub.url), CommitStore(':memory:'))
+    assert refreshed.to_dict() == fresh.to_dict(), "the refreshed timeline differs"
+
+def check_render_keys():
+    """Render cache keys are the same in every process and follow mapping order."""
+    keys = {subprocess.run([sys.executable, '-c', TIMELINE_KEY], capture_output=True, text=True,
+                           check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                           env=dict(os.environ, PYTHONHASHSEED=str(seed))).stdout
+            for seed in (1, 2)}
+    assert len(keys) == 1, "the timeline key depends on the hash seed"
+
+    # The pie draws slices in dict order, so reordered stats are a different chart
+    assert RenderCache.make_key('create_language_pie', {'Python': 50, 'Go': 50}) != \
+        RenderCache.make_key('create_language_pie', {'Go': 50, 'Python': 50})
+    assert RenderCache.make_key('create_language_pie', {}, {'profile': 'print', 'format': 'png'}) == \
+        RenderCache.make_key('create_language_pie', {}, {'format': 'png', 'profile': 'print'})
+
+def check_commit_index():
+    """CommitIndex reductions agree with plain counting over the same rows."""
+    account = make_account(USERNAME, repos=20, commits_per_repo=30, seed=3)
+    days = Counter((commit['commit']['author']['date'][:10], name)
+                   for name, commits in account['commits'].items() for commit in commits)
+    index = CommitIndex.from_rows([(day, repo, count) for (day, repo), count in days.items()])
+
+    assert index.repo_totals() == {name: len(commits)
+                                   for name, commits in account['commits'].items() if commits}
+    first, last = index.span()
+    assert (str(first), str(last)) == (min(day for day, _ in days), max(day for day, _ in days))
+
+    start, totals = index.daily_totals('2021-03-01', '2021-05-31')
+    per_day = Counter()
+    for (day, _), count in days.items():
+        per_day[day] += count
+    assert str(start) == '2021-03-01' and len(totals) == 92
+    assert {str(start + i): int(total) for i, total in enumerate(totals) if total} == \
+        {day: count for day, count in per_day.items() if '2021-03-01' <= day <= '2021-05-31'}
+
+    months = Counter()
+    for (day, repo), count in days.items():
+        months[day[:7], repo] += count
+    rows = index.monthly_rows()
+    assert [row[0] for row in rows] == sorted(row[0] for row in rows)
+    assert {(month, repo): count for month, repo, count in rows} == months
+
+    languages = {repo['name']: repo['language'] for repo in account['repos'] if repo['language']}
+    expected = Counter()
+    for name, language in languages.items():
+        expected[language] += len(account['commits'][name])
+    assert index.language_weights(languages) == expected
+
+def check_backends_agree():
+    """The REST and GraphQL backends return the same stats."""
+    account = make_account(USERNAME, repos=30, commits_per_repo=20)
+    with FakeGitHub(account) as hub:
+        client, store = GitHubClient(api_url=hub.url), CommitStore(':memory:')
+        rest = (get_timeline(USERNAME, client, store).to_dict(),
+                get_language_stats(USERNAME, client, store),
+                get_commit_index(USERNAME, client, store).to_dict())
+        client = GitHubClient(token='regression', api_url=hub.url)
+        bulk = (graphql.get_timeline(USERNAME, client).to_dict(),
+                graphql.get_language_stats(USERNAME, client),
+                graphql.get_commit_index(USERNAME, client).to_dict())
+    for name, a, b in zip(('timeline', 'language stats', 'commit index'), rest, bulk):
+        assert a == b, f"the backends disagree on the {name}"
+
+def check_unknown_user():
+    """A login the API does not know yields empty stats marked incomplete."""
+    account = make_account(USERNAME, repos=3)
+    with FakeGitHub(account) as hub:
+        client = GitHubClient(api_url=hub.url)
+        assert get_language_stats('nobody', client, CommitStore(':memory:')) == {}
+        assert not get_timeline('nobody', client, CommitStore(':memory:'))
+        assert get_incomplete(client), "the missing user was not reported"
+
+        client = GitHubClient(token='regression', api_url=hub.url)
+        assert graphql.get_language_stats('nobody', client) == {}
+        assert get_incomplete(client), "the missing user was not reported over GraphQL"
+
+def check_server_bounds():
+    """Refreshes swap in whole builds and leave nothing behind, and disk use is capped."""
+    account = make_account(USERNAME, repos=5, commits_per_repo=10)
+    with FakeGitHub(account) as hub, tempfile.TemporaryDirectory() as directory:
+        os.environ['MYLIFE_CACHE_DIR'] = directory  # Inherited by the render workers
+        client = GitHubClient(token='regression', api_url=hub.url)
+        server = ResumeServer(port=0, output_dir=os.path.join(directory, 'server'), client=client,
+                              backend=graphql, disk_users=1)
+        server.render_pool = RenderPool(1)
+        user_dir = os.path.join(server.output_dir, USERNAME)
+        try:
+            server.refresh(USERNAME)
+            with open(os.path.join(user_dir, 'repo_wordcloud.svg'), 'w') as f:
+                f.write('<svg/>')  # A chart an earlier build produced
+            server.refresh(USERNAME)
+            server.refresh('nobody')
+        finally:
+            server.render_pool.close()
+            server.httpd.server_close()
+            del os.environ['MYLIFE_CACHE_DIR']
+        assert not client.inventory and not client.incomplete, "the client kept per-user state"
+        assert sorted(os.listdir(server.output_dir)) == ['nobody', USERNAME], "a build was left over"
+        assert sorted(os.listdir(user_dir)) == sorted(server.files), "stale charts were kept"
+
+        def notes(username):
+            with open(os.path.join(server.output_dir, username, 'stats.json')) as f:
+                return json.load(f)['incomplete']
+        assert notes(USERNAME) == [] and notes('nobody'), "stats.json lacks incomplete notes"
+
+        server.memory.clear()
+        server.evict_disk()
+        assert os.listdir(server.output_dir) == ['nobody'], "the oldest build was not evicted"
+
+CHECKS = [check_cache_revalidation, check_scheduler_waits, check_incremental_sync,
+          check_refresh_requests, check_render_keys, check_commit_index, check_backends_agree,
+          check_unknown_user, check_server_bounds]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run regression checks against a fake GitHub API.")
+    parser.add_argument('names', nargs='*', help="only run checks whose name contains one of these")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for check in CHECKS:
+        name = check.__name__[len('check_'):]
+        if args.names and not any(word in name for word in args.names):
+            continue
+        start = time.perf_counter()
+        try:
+            check()
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL  {name}: {e or check.__doc__}")
+        else:
+            print(f"ok    {name} ({time.perf_counter() - start:.2f}s)")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())